@@ -0,0 +1,211 @@
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+import lab2
+
+STAGES = ["tokenize", "features", "rules", "translate", "clean"]
+SECTIONS = [("Masc N (nouns) :", "N"), ("Fem N (nouns) :", "N"), ("V (verbs) :", "V"),
+            ("ADJ (adjectives) :", "ADJ"), ("PREP (prepositions) :", "PREP")]
+RULE_TAGS = ["N", "V", "ADJ", "DET", "PREP"]
+PUNCTUATION = [".", ",", "!", "?"]
+
+# Write a synthetic lexicon in the lexicon.txt format, returns the English words
+def make_lexicon(path, size):
+    words = []
+    per_section = max(1, size // len(SECTIONS))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("DET (determiners) :\nThe -> Le\nThe -> La\nA -> Un\nA -> Une\n\n")
+        words += ["the", "a"]
+        for header, _ in SECTIONS:
+            f.write(header + "\n")
+            for _ in range(per_section):
+                word = f"w{len(words)}"
+                f.write(f"{word} -> f{len(words)}\n")
+                words.append(word)
+            f.write("\n")
+    return words
+
+# Write random POS rewriting rules, reordering the left side
+def make_rules(path, count, rng):
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(count):
+            left = [rng.choice(RULE_TAGS) for _ in range(rng.randint(1, 4))]
+            right = left[:]
+            rng.shuffle(right)
+            f.write(" + ".join(left) + " -> " + " + ".join(right) + "\n")
+
+def make_corpus(words, count, rng, min_len=4, max_len=20):
+    sentences = []
+    for _ in range(count):
+        toks = []
+        for _ in range(rng.randint(min_len, max_len)):
+            # Mostly known words, some unknown ones
+            toks.append(rng.choice(words) if rng.random() < 0.9 else f"unk{rng.randint(0, 999)}")
+            if rng.random() < 0.1:
+                toks.append(rng.choice(PUNCTUATION))
+        sentences.append(" ".join(toks))
+    return sentences
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+def summarize(latencies_ns):
+    values = sorted(latencies_ns)
+    total = sum(values)
+    return {
+        "total_s": total / 1e9,
+        "throughput_sps": len(values) / (total / 1e9) if total else None,
+        "p50_us": percentile(values, 50) / 1e3,
+        "p99_us": percentile(values, 99) / 1e3,
+    }
+
+# Time every stage separately for each sentence
+def run_stages(sentences, lexicon, gender_map, rules):
+    timings = {stage: [] for stage in STAGES}
+    end_to_end = []
+    clock = time.perf_counter_ns
+    for sentence in sentences:
+        t0 = clock()
+        tokens = lab2.tokenize(sentence)
+        t1 = clock()
+        token_features = lab2.get_token_features(tokens, lexicon, gender_map)
+        t2 = clock()
+        tokens, token_features = lab2.apply_rewriting_rules(tokens, token_features, rules)
+        t3 = clock()
+        translated = lab2.translate(tokens, token_features, lexicon, gender_map)
+        t4 = clock()
+        lab2.clean_punctuation(translated)
+        t5 = clock()
+        for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t4), (t1, t2, t3, t4, t5)):
+            timings[stage].append(end - start)
+        end_to_end.append(t5 - t0)
+    result = {stage: summarize(values) for stage, values in timings.items()}
+    result["end_to_end"] = summarize(end_to_end)
+    return result
+
+def bench_config(workdir, lexicon_size, rule_count, num_sentences, seed):
+    rng = random.Random(seed)
+    lexicon_file = os.path.join(workdir, f"lexicon_{lexicon_size}.txt")
+    rules_file = os.path.join(workdir, f"rules_{rule_count}.txt")
+    words = make_lexicon(lexicon_file, lexicon_size)
+    make_rules(rules_file, rule_count, rng)
+    sentences = make_corpus(words, num_sentences, rng)
+
+    # Peak memory of building the lexicon and rule matcher from source
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    lexicon, gender_map = lab2.load_lexicon(lexicon_file, use_cache=False)
+    t1 = time.perf_counter()
+    rules = lab2.compile_rules(lab2.load_rules(rules_file))
+    t2 = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Cold cache write, then a warm load from the compiled lexicon
+    lab2.load_lexicon(lexicon_file)
+    t3 = time.perf_counter()
+    lab2.load_lexicon(lexicon_file)
+    t4 = time.perf_counter()
+
+    return {
+        "lexicon_size": lexicon_size,
+        "rule_count": rule_count,
+        "sentences": num_sentences,
+        "load_lexicon_s": t1 - t0,
+        "load_lexicon_cached_s": t4 - t3,
+        "compile_rules_s": t2 - t1,
+        "load_peak_mb": peak / 2**20,
+        "stages": run_stages(sentences, lexicon, gender_map, rules),
+    }
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+# Print configs whose end-to-end throughput dropped by more than `threshold` against a previous run
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {(r["lexicon_size"], r["rule_count"]): r for r in baseline["results"]}
+    regressions = 0
+    for r in results:
+        prev = old.get((r["lexicon_size"], r["rule_count"]))
+        if prev is None:
+            continue
+        new_tp = r["stages"]["end_to_end"]["throughput_sps"]
+        old_tp = prev["stages"]["end_to_end"]["throughput_sps"]
+        if old_tp and new_tp is not None and new_tp < old_tp * (1 - threshold):
+            regressions += 1
+            print(f"REGRESSION lexicon={r['lexicon_size']} rules={r['rule_count']}: "
+                  f"{old_tp:.0f} -> {new_tp:.0f} sentences/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the lab2 translator.")
+    parser.add_argument("--lexicon-sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--rule-counts", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--grid", action="store_true",
+                        help="run every lexicon size with every rule count instead of two one-axis sweeps")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_lab2.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="report throughput regressions against a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative throughput drop counted as a regression")
+    args = parser.parse_args()
+
+    if args.grid:
+        configs = [(l, r) for l in args.lexicon_sizes for r in args.rule_counts]
+    else:
+        # Vary one axis at a time around the smallest value of the other
+        configs = [(l, min(args.rule_counts)) for l in args.lexicon_sizes]
+        configs += [(min(args.lexicon_sizes), r) for r in args.rule_counts if r != min(args.rule_counts)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for lexicon_size, rule_count in configs:
+            r = bench_config(workdir, lexicon_size, rule_count, args.sentences, args.seed)
+            results.append(r)
+            e2e = r["stages"]["end_to_end"]
+            print(f"lexicon={lexicon_size:>8} rules={rule_count:>6}  "
+                  f"{e2e['throughput_sps']:>10.0f} sentences/s  p50={e2e['p50_us']:.1f}us  "
+                  f"p99={e2e['p99_us']:.1f}us  load_peak={r['load_peak_mb']:.1f}MB")
+            for stage in STAGES:
+                s = r["stages"][stage]
+                print(f"    {stage:<10} p50={s['p50_us']:.1f}us  p99={s['p99_us']:.1f}us  total={s['total_s']:.3f}s")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("Saved results to", args.output)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
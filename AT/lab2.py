@@ -1,7 +1,23 @@
 import re
+import gc
+import os
+import sys
+import pickle
+import argparse
+from collections import OrderedDict, deque, namedtuple
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 
-# Load lexicon with normalized POS and gender
-def load_lexicon(filename="lexicon.txt"):
+POS_TAGS = ["ADJ", "N", "V", "DET", "PREP", "CONJ", "PNOUN"]
+
+# One lexicon entry; a tuple subclass without per-instance dict
+LexEntry = namedtuple("LexEntry", ["translation", "pos", "gender"])
+
+# Bump when the layout of the compiled lexicon changes
+LEXICON_CACHE_VERSION = 1
+
+# Parse lexicon.txt into {word: [(translation, pos, gender), ...]} with interned strings
+def parse_lexicon(filename):
     lexicon = {}
     gender_map = {}  # noun -> gender
     current_pos = None
@@ -23,7 +39,7 @@ def load_lexicon(filename="lexicon.txt"):
                     current_pos = "N"
                     current_gender = "F"
                 else:
-                    current_pos = header.split()[0]  # V, DET, ADJ, PREP
+                    current_pos = sys.intern(header.split()[0])  # V, DET, ADJ, PREP
                     current_gender = None
                 continue
 
@@ -33,14 +49,10 @@ def load_lexicon(filename="lexicon.txt"):
             else:
                 eng = fr = line.strip()
 
-            key = eng.lower()
+            key = sys.intern(eng.lower())
             if key not in lexicon:
                 lexicon[key] = []
-            lexicon[key].append({
-                "translation": fr,
-                "pos": current_pos,
-                "gender": current_gender
-            })
+            lexicon[key].append((sys.intern(fr), current_pos, current_gender))
 
             # Track gender for nouns
             if current_gender in ("M", "F"):
@@ -48,6 +60,64 @@ def load_lexicon(filename="lexicon.txt"):
 
     return lexicon, gender_map
 
+# Identify the source file version the compiled cache was built from
+def _lexicon_stamp(filename):
+    st = os.stat(filename)
+    return (LEXICON_CACHE_VERSION, st.st_mtime_ns, st.st_size)
+
+def _read_lexicon_cache(cache_file, stamp):
+    try:
+        with open(cache_file, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("stamp") != stamp:
+        return None
+    return cached["lexicon"], cached["gender_map"]
+
+def _write_lexicon_cache(cache_file, stamp, lexicon, gender_map):
+    # Write to a temporary file and rename, so concurrent workers never read a partial cache
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump({"stamp": stamp, "lexicon": lexicon, "gender_map": gender_map},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # A read-only directory only costs the speed-up
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+
+# Load lexicon with normalized POS and gender.
+# The parsed form is kept in "<filename>.cache" and reused while the source file's mtime and size are unchanged.
+def load_lexicon(filename="lexicon.txt", use_cache=True):
+    cache_file = f"{filename}.cache"
+    stamp = _lexicon_stamp(filename)
+
+    # Hundreds of thousands of small acyclic tuples would trigger the cyclic GC over and over
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_lexicon(filename, cache_file, stamp, use_cache)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def _load_lexicon(filename, cache_file, stamp, use_cache):
+    loaded = _read_lexicon_cache(cache_file, stamp) if use_cache else None
+    if loaded is None:
+        loaded = parse_lexicon(filename)
+        if use_cache:
+            _write_lexicon_cache(cache_file, stamp, *loaded)
+
+    raw_lexicon, gender_map = loaded
+    # Cache stores plain tuples, so it does not depend on the module LexEntry was pickled from
+    make = LexEntry._make
+    lexicon = {key: tuple(map(make, entries)) for key, entries in raw_lexicon.items()}
+    return lexicon, gender_map
+
 # Load rules dynamically
 def load_rules(filename="rules.txt"):
     rules = []
@@ -67,59 +137,91 @@ def get_token_features(tokens, lexicon, gender_map):
         low = tok.lower()
         if low in lexicon:
             entry = lexicon[low][0]
-            features.append({"pos": entry["pos"], "gender": entry["gender"]})
+            features.append({"pos": entry.pos, "gender": entry.gender})
         else:
             features.append({"pos": None, "gender": None})
     return features
 
+# Compile rules into a trie over POS tags, so every position is matched in one walk
+class RuleMatcher:
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # node = [children by POS, (rule index, pattern length, actions) or None]
+        self.root = [{}, None]
+
+        for idx, (left, right) in enumerate(self.rules):
+            left_pattern = [x for x in left if x != "+"]
+            if not left_pattern:
+                continue
+
+            node = self.root
+            for tag in left_pattern:
+                node = node[0].setdefault(tag, [{}, None])
+
+            # Keep the first rule for duplicated patterns
+            if node[1] is None:
+                node[1] = (idx, len(left_pattern), self.compile_right(left_pattern, right))
+
+    # Turn the right side into actions: int = index into the matched window, str = literal word
+    @staticmethod
+    def compile_right(left_pattern, right):
+        actions = []
+        for item in right:
+            if item == "+":
+                continue
+            if item in POS_TAGS:
+                # ADJ + N -> N + ADJ: the matched POS sequence equals the pattern,
+                # so the first word with this POS is at its first index in the pattern
+                if item in left_pattern:
+                    actions.append(left_pattern.index(item))
+            else:
+                actions.append(item)
+        return actions
+
+    # Return (pattern length, actions) of the first rule matching at position i, or None
+    def match(self, token_features, i):
+        best = None
+        node = self.root
+        for j in range(i, len(token_features)):
+            node = node[0].get(token_features[j]["pos"])
+            if node is None:
+                break
+            if node[1] is not None and (best is None or node[1][0] < best[0]):
+                best = node[1]
+        if best is None:
+            return None
+        return best[1], best[2]
+
+def compile_rules(rules):
+    return RuleMatcher(rules)
+
 # Apply POS-based rewriting rules
 def apply_rewriting_rules(tokens, token_features, rules):
+    matcher = rules if isinstance(rules, RuleMatcher) else compile_rules(rules)
     i = 0
     output_tokens = []
     output_features = []
 
     while i < len(tokens):
-        matched = False
-        for left, right in rules:
-            pattern_len = len([x for x in left if x != "+"])
-            if i + pattern_len > len(tokens):
-                continue
-
-            # Build POS sequence for matching
-            seq_match = [token_features[i+j]["pos"] for j in range(pattern_len)]
-            left_pattern = [x for x in left if x != "+"]
-
-            if seq_match == left_pattern:
-                # Reorder according to rule
-                new_tokens = []
-                new_features = []
-                for item in right:
-                    if item == "+":
-                        continue
-                    # Determine which index in left it refers to
-                    # ADJ + N -> N + ADJ
-                    if item in ["ADJ", "N", "V", "DET", "PREP", "CONJ", "PNOUN"]:
-                        # Match each POS in the rule to the correct original word
-                        for j in range(pattern_len):
-                            if token_features[i+j]["pos"] == item:
-                                new_tokens.append(tokens[i+j])
-                                new_features.append(token_features[i+j])
-                                break
-                    else:
-                        # If item is literal word, just append
-                        new_tokens.append(item)
-                        new_features.append({"pos": None, "gender": None})
-
-                output_tokens.extend(new_tokens)
-                output_features.extend(new_features)
-                i += pattern_len
-                matched = True
-                break
+        found = matcher.match(token_features, i)
 
-        if not matched:
+        if found is None:
             output_tokens.append(tokens[i])
             output_features.append(token_features[i])
             i += 1
+            continue
+
+        # Reorder according to rule
+        pattern_len, actions = found
+        for action in actions:
+            if isinstance(action, int):
+                output_tokens.append(tokens[i+action])
+                output_features.append(token_features[i+action])
+            else:
+                # If item is literal word, just append
+                output_tokens.append(action)
+                output_features.append({"pos": None, "gender": None})
+        i += pattern_len
 
     return output_tokens, output_features
 
@@ -130,7 +232,7 @@ def translate(tokens, token_features, lexicon, gender_map):
         low = tok.lower()
 
         # DET
-        if low in lexicon and lexicon[low][0]["pos"] == "DET":
+        if low in lexicon and lexicon[low][0].pos == "DET":
             next_gender = None
             if i + 1 < len(tokens) and token_features[i+1]["gender"]:
                 next_gender = token_features[i+1]["gender"]
@@ -145,7 +247,7 @@ def translate(tokens, token_features, lexicon, gender_map):
 
         # General translation
         if low in lexicon:
-            result.append(lexicon[low][0]["translation"])
+            result.append(lexicon[low][0].translation)
         else:
             result.append(tok)
 
@@ -161,9 +263,168 @@ def clean_punctuation(translated):
             cleaned.append(tok)
     return cleaned
 
-def main():
-    lexicon, gender_map = load_lexicon()
-    rules = load_rules()
+# Tokenize sentence
+def tokenize(sentence):
+    return re.findall(r"\w+|[^\w\s]", sentence)
+
+# Full pipeline for one sentence
+def translate_sentence(sentence, lexicon, gender_map, rules):
+    tokens = tokenize(sentence)
+    token_features = get_token_features(tokens, lexicon, gender_map)
+    return _translate_tokens(tokens, token_features, lexicon, gender_map, rules)
+
+def _translate_tokens(tokens, token_features, lexicon, gender_map, rules):
+    # Apply rewriting rules
+    tokens, token_features = apply_rewriting_rules(tokens, token_features, rules)
+
+    # Translate
+    translated = translate(tokens, token_features, lexicon, gender_map)
+
+    # Clean punctuation
+    translated = clean_punctuation(translated)
+
+    return " ".join(translated)
+
+# Bounded LRU cache of finished translations with hit/miss counters
+class TranslationMemory:
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+# Lexicon, rules and the caches derived from them; reloading drops the caches
+class Translator:
+    def __init__(self, lexicon_file="lexicon.txt", rules_file="rules.txt", memory_size=10000):
+        self.lexicon_file = lexicon_file
+        self.rules_file = rules_file
+        self.memory = TranslationMemory(memory_size)
+        self.features = {}  # lowercased known word -> features
+        self.reload()
+
+    def _file_stamps(self):
+        return os.stat(self.lexicon_file).st_mtime_ns, os.stat(self.rules_file).st_mtime_ns
+
+    def reload(self):
+        self.lexicon, self.gender_map = load_lexicon(self.lexicon_file)
+        self.rules = compile_rules(load_rules(self.rules_file))
+        self.stamps = self._file_stamps()
+        self.memory.clear()
+        self.features.clear()
+
+    # Reload when lexicon.txt or rules.txt changed on disk
+    def reload_if_changed(self):
+        if self._file_stamps() != self.stamps:
+            self.reload()
+            return True
+        return False
+
+    # Same as get_token_features, memoized per known word
+    def token_features(self, tokens):
+        features = []
+        for tok in tokens:
+            low = tok.lower()
+            feat = self.features.get(low)
+            if feat is None:
+                feat = get_token_features([low], self.lexicon, self.gender_map)[0]
+                # Unknown words are not kept, so the memo stays bounded by the lexicon size
+                if low in self.lexicon:
+                    self.features[low] = feat
+            features.append(feat)
+        return features
+
+    def translate_sentence(self, sentence):
+        tokens = tokenize(sentence)
+        # The token sequence is the key, so spacing differences share an entry
+        key = tuple(tokens)
+        translated = self.memory.get(key)
+        if translated is None:
+            token_features = self.token_features(tokens)
+            translated = _translate_tokens(tokens, token_features, self.lexicon, self.gender_map, self.rules)
+            self.memory.put(key, translated)
+        return translated
+
+# Lazily translate an iterable of lines, one output line per input line
+def translate_lines(lines, translator):
+    for line in lines:
+        yield translator.translate_sentence(line.rstrip("\n"))
+
+# Worker state for the process pool, loaded once per process
+_worker = {}
+
+def _init_worker(lexicon_file, rules_file, memory_size):
+    _worker["translator"] = Translator(lexicon_file, rules_file, memory_size)
+
+def _translate_chunk(lines):
+    return list(translate_lines(lines, _worker["translator"]))
+
+# Shard lines across processes in chunks, yielding results in input order
+def translate_lines_parallel(lines, lexicon_file="lexicon.txt", rules_file="rules.txt",
+                             workers=None, chunk_size=1000, memory_size=10000):
+    lines = iter(lines)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(lexicon_file, rules_file, memory_size)) as pool:
+        # Keep a bounded number of chunks in flight so the input is never read whole
+        max_pending = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(islice(lines, chunk_size))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_translate_chunk, chunk))
+            if not pending:
+                break
+            yield from pending.popleft().result()
+
+# Translate a file (or stdin/stdout for "-") line by line; workers=0 runs in-process, None uses all cores
+def translate_file(input_path, output_path, lexicon_file="lexicon.txt", rules_file="rules.txt",
+                   workers=0, chunk_size=1000, memory_size=10000):
+    src = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8")
+    dst = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        if workers == 0:
+            results = translate_lines(src, Translator(lexicon_file, rules_file, memory_size))
+        else:
+            results = translate_lines_parallel(src, lexicon_file, rules_file, workers=workers or None,
+                                               chunk_size=chunk_size, memory_size=memory_size)
+        count = 0
+        for translated in results:
+            dst.write(translated + "\n")
+            count += 1
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return count
+
+def interactive(lexicon_file="lexicon.txt", rules_file="rules.txt", memory_size=10000):
+    translator = Translator(lexicon_file, rules_file, memory_size)
 
     print("English-to-French word-by-word translator. Type 'exit' to quit.")
 
@@ -172,20 +433,31 @@ def main():
         if sentence.strip().lower() == "exit":
             break
 
-        # Tokenize sentence
-        tokens = re.findall(r"\w+|[^\w\s]", sentence)
-        token_features = get_token_features(tokens, lexicon, gender_map)
-
-        # Apply rewriting rules
-        tokens, token_features = apply_rewriting_rules(tokens, token_features, rules)
+        # Pick up edits to lexicon.txt / rules.txt between sentences
+        translator.reload_if_changed()
+        print("Translation:", translator.translate_sentence(sentence))
 
-        # Translate
-        translated = translate(tokens, token_features, lexicon, gender_map)
-
-        # Clean punctuation
-        translated = clean_punctuation(translated)
-
-        print("Translation:", " ".join(translated))
+def main():
+    parser = argparse.ArgumentParser(description="English-to-French word-by-word translator.")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="translate INPUT line by line ('-' for stdin) instead of the interactive mode")
+    parser.add_argument("-o", "--output", default="-", help="output file for --batch ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="process pool size for --batch (0 = single process, -1 = all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="lines per worker task")
+    parser.add_argument("--memory-size", type=int, default=10000,
+                        help="sentences kept in the translation memory (0 disables it)")
+    parser.add_argument("--lexicon", default="lexicon.txt")
+    parser.add_argument("--rules", default="rules.txt")
+    args = parser.parse_args()
+
+    if args.batch is None:
+        interactive(args.lexicon, args.rules, args.memory_size)
+        return
+
+    workers = None if args.workers < 0 else args.workers
+    translate_file(args.batch, args.output, args.lexicon, args.rules,
+                   workers=workers, chunk_size=args.chunk_size, memory_size=args.memory_size)
 
 if __name__ == "__main__":
     main()
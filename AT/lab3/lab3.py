@@ -1,10 +1,21 @@
-# pip install googletrans==4.0.0-rc1, matplotlib, sentence-transformers
+# pip install googletrans==4.0.0-rc1, matplotlib, sentence-transformers, levenshtein, rapidfuzz, numpy
 
 from googletrans import Translator, LANGUAGES
 import Levenshtein
-from sentence_transformers import SentenceTransformer, util
-import matplotlib.pyplot as plt
+import numpy as np
+from rapidfuzz.process import cdist
+from rapidfuzz.distance import Levenshtein as RFLevenshtein
+import os
+import csv
+import json
 import random
+import time
+import sqlite3
+import argparse
+import threading
+from types import SimpleNamespace
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Textual similarity using Levenshtein
 def textual_similarity(a, b):
@@ -12,56 +23,342 @@ def textual_similarity(a, b):
     similarity = 1 - distance / max(len(a), len(b))
     return similarity
 
-# Initialize Sentence-BERT model
-sbert_model = SentenceTransformer('all-MiniLM-L6-v2')
+# Sentence-BERT model, loaded on first use and shared by all threads.
+# sentence-transformers (and torch) are imported only then, so importing this module stays fast.
+SBERT_MODEL_NAME = 'all-MiniLM-L6-v2'
+_sbert_model = None
+_sbert_lock = threading.Lock()
+
+def get_sbert_model():
+    global _sbert_model
+    if _sbert_model is None:
+        with _sbert_lock:
+            if _sbert_model is None:
+                from sentence_transformers import SentenceTransformer
+                _sbert_model = SentenceTransformer(SBERT_MODEL_NAME)
+    return _sbert_model
+
+def cos_sim(a, b):
+    from sentence_transformers import util
+    return util.cos_sim(a, b)
+
+# Embeddings by text, so the original and repeated outputs are encoded once (least recently used evicted)
+embedding_cache = OrderedDict()
+EMBEDDING_CACHE_SIZE = 100000
+_embedding_lock = threading.Lock()
+
+# Encode texts in batches, returns a (len(texts), dim) tensor
+def encode_texts(texts, batch_size=32):
+    import torch
+    if not texts:
+        return torch.empty(0, get_sbert_model().get_sentence_embedding_dimension())
+    with _embedding_lock:
+        found = {t: embedding_cache[t] for t in texts if t in embedding_cache}
+        for t in found:
+            embedding_cache.move_to_end(t)
+    missing = [t for t in dict.fromkeys(texts) if t not in found]
+    if missing:
+        embeddings = get_sbert_model().encode(missing, batch_size=batch_size, convert_to_tensor=True)
+        with _embedding_lock:
+            for t, emb in zip(missing, embeddings):
+                found[t] = emb
+                embedding_cache[t] = emb
+            # Drop the least recently used entries once the cache is full
+            while len(embedding_cache) > EMBEDDING_CACHE_SIZE:
+                embedding_cache.popitem(last=False)
+    return torch.stack([found[t] for t in texts])
 
 def semantic_similarity(a, b):
-    emb1 = sbert_model.encode(a)
-    emb2 = sbert_model.encode(b)
-    return util.cos_sim(emb1, emb2).item()
+    emb = encode_texts([a, b])
+    return cos_sim(emb[0], emb[1]).item()
+
+# Similarity of every translation step to the original in one encode call and one matrix op
+def semantic_similarities(original, translations, batch_size=32):
+    translations = list(translations)
+    if not translations:
+        import torch
+        return torch.empty(0)
+    emb = encode_texts([original] + translations, batch_size=batch_size)
+    return cos_sim(emb[:1], emb[1:])[0]
+
+# Step-to-step textual similarity for all pairs, same formula as textual_similarity.
+# Edit distances are computed by rapidfuzz (the Levenshtein package's backend) on `workers` threads.
+def textual_similarity_matrix(texts, workers=-1):
+    distances = cdist(texts, texts, scorer=RFLevenshtein.distance, dtype=np.int32, workers=workers)
+    lengths = np.array([len(t) for t in texts])
+    max_len = np.maximum.outer(lengths, lengths)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sims = 1 - distances / max_len
+    # Two empty strings are identical
+    sims[max_len == 0] = 1.0
+    return sims
+
+# Step-to-step cosine similarity for all pairs from one embedding matrix product
+def semantic_similarity_matrix(texts, batch_size=32):
+    emb = encode_texts(texts, batch_size=batch_size)
+    return cos_sim(emb, emb).cpu().numpy()
+
+# N x N drift matrices for many chains. Returns (textual, semantic) as arrays of shape
+# (num_chains, N, N) when all chains have the same length, otherwise as lists of arrays.
+def drift_matrices(chains, workers=-1, batch_size=32):
+    # Encode every distinct text of every chain in one pass
+    encode_texts([t for chain in chains for t in chain], batch_size=batch_size)
+    textual = [textual_similarity_matrix(chain, workers) for chain in chains]
+    semantic = [semantic_similarity_matrix(chain, batch_size) for chain in chains]
+    if len({len(chain) for chain in chains}) == 1:
+        return np.stack(textual), np.stack(semantic)
+    return textual, semantic
+
+# Drift caused by each hop (step i -> i+1), taken from the first off-diagonal of a drift matrix
+def hop_drift(matrix):
+    return 1 - np.diagonal(matrix, offset=1, axis1=-2, axis2=-1)
+
+# Offline stand-in for the googletrans Translator, for benchmarks and tests.
+# Returns the text unchanged after an optional simulated network delay.
+class EchoTranslator:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def translate(self, text, dest="en"):
+        if self.delay:
+            time.sleep(self.delay)
+        return SimpleNamespace(text=text, dest=dest)
+
+# Spaces out calls shared by all threads to at most `rate` per second
+class RateLimiter:
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# Persistent (text, target language) -> translation cache in SQLite.
+# Safe to share between threads (one connection per thread) and processes (WAL, busy timeout).
+# Least recently used rows are evicted once the table grows past max_entries.
+class TranslationCache:
+    def __init__(self, path="translation_cache.sqlite", max_entries=1000000, evict_every=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+
+        conn = self._conn()
+        with conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS translations (
+                                text TEXT NOT NULL,
+                                lang TEXT NOT NULL,
+                                result TEXT NOT NULL,
+                                last_used REAL NOT NULL,
+                                UNIQUE (text, lang))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, text, lang):
+        conn = self._conn()
+        row = conn.execute("SELECT result FROM translations WHERE text = ? AND lang = ?", (text, lang)).fetchone()
+        with self.lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE translations SET last_used = ? WHERE text = ? AND lang = ?",
+                         (time.time(), text, lang))
+        return row[0]
+
+    def put(self, text, lang, result):
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO translations (text, lang, result, last_used) VALUES (?, ?, ?, ?)",
+                         (text, lang, result, time.time()))
+        with self.lock:
+            self.puts += 1
+            evict = self.puts % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        conn = self._conn()
+        with conn:
+            count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute("""DELETE FROM translations WHERE rowid IN (
+                                    SELECT rowid FROM translations ORDER BY last_used LIMIT ?)""", (excess,))
+
+    def stats(self):
+        size = self._conn().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        total = self.hits + self.misses
+        return {"size": size, "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+# One translation call with retries and exponential backoff
+def translate_step(translator, text, lang, retries=0, backoff=1.0, limiter=None, cache=None):
+    if cache is not None:
+        cached = cache.get(text, lang)
+        if cached is not None:
+            return cached
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            result = translator.translate(text, dest=lang).text
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+            continue
+        if cache is not None:
+            cache.put(text, lang, result)
+        return result
+
+# Random language sequence ending with English
+def random_languages(num_steps=15, rng=random):
+    all_langs = list(LANGUAGES.keys())
+    all_langs.remove('en')  # English for final translation
+    random_langs = rng.sample(all_langs, min(num_steps, len(all_langs)))
+    random_langs.append('en')  # back to English
+    return random_langs
 
 # Function with random languages
-def weird_translate(text, num_steps=15):
-    translator = Translator()
+def weird_translate(text, num_steps=15, translator=None, rng=random, verbose=True,
+                    retries=0, backoff=1.0, limiter=None, cache=None, langs=None):
+    if translator is None:
+        translator = Translator()
     original_text = text
     translations = [original_text]
 
     # Build random language sequence
-    all_langs = list(LANGUAGES.keys())
-    all_langs.remove('en')  # English for final translation
-    random_langs = random.sample(all_langs, min(num_steps, len(all_langs)))
-    random_langs.append('en')  # back to English
+    random_langs = langs if langs is not None else random_languages(num_steps, rng)
 
-    print("Random translation sequence:", random_langs)
+    if verbose:
+        print("Random translation sequence:", random_langs)
 
     current_text = original_text
     for i, lang in enumerate(random_langs):
-        translated = translator.translate(current_text, dest=lang)
-        current_text = translated.text
+        current_text = translate_step(translator, current_text, lang, retries, backoff, limiter, cache)
         translations.append(current_text)
-        print(f"Step {i+1} ({LANGUAGES[lang]}): {current_text}")
+        if verbose:
+            print(f"Step {i+1} ({LANGUAGES[lang]}): {current_text}")
 
     return translations
 
-text = input("Enter text: ")
-translations = weird_translate(text)
-
-# Compute similarities
-text_sims = [textual_similarity(text, t) for t in translations]
-semantic_sims = [semantic_similarity(text, t) for t in translations]
-
-print(f"Textual similarity after final translation: {text_sims[-1]:.4f}")
-print(f"Semantic similarity after final translation: {semantic_sims[-1]:.4f}")
-
-# Plot similarities
-steps = list(range(len(translations)))
-plt.figure(figsize=(12, 6))
-plt.plot(steps, text_sims, marker='o', label="Textual similarity (Levenshtein)")
-plt.plot(steps, semantic_sims, marker='s', label="Semantic similarity (SBERT)")
-plt.xticks(steps)
-plt.xlabel("Translation Step")
-plt.ylabel("Similarity to Original")
-plt.title("Weird Translator: Textual and Semantic Change Over Steps")
-plt.legend()
-plt.grid(True)
-plt.show()
+# Run many independent chains on a bounded thread pool; steps inside a chain stay sequential.
+# Each worker thread gets its own translator from translator_factory.
+# Returns the chains in input order, None for a chain that failed after all retries.
+def run_chains(texts, num_steps=15, translator_factory=Translator, max_concurrency=8,
+               retries=3, backoff=1.0, rate_limit=None, seed=None, cache=None):
+    limiter = RateLimiter(rate_limit)
+    local = threading.local()
+
+    def run_one(i, text):
+        if not hasattr(local, "translator"):
+            local.translator = translator_factory()
+        rng = random.Random(None if seed is None else seed + i)
+        return weird_translate(text, num_steps, translator=local.translator, rng=rng, verbose=False,
+                               retries=retries, backoff=backoff, limiter=limiter, cache=cache)
+
+    results = [None] * len(texts)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {pool.submit(run_one, i, text): i for i, text in enumerate(texts)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                print(f"Chain {i} failed: {e}")
+    return results
+
+# Plot similarities; saved to `path` when given, otherwise shown in a window
+def plot_similarities(text_sims, semantic_sims, path=None):
+    import matplotlib
+    if path is not None:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    steps = list(range(len(text_sims)))
+    plt.figure(figsize=(12, 6))
+    plt.plot(steps, text_sims, marker='o', label="Textual similarity (Levenshtein)")
+    plt.plot(steps, semantic_sims, marker='s', label="Semantic similarity (SBERT)")
+    plt.xticks(steps)
+    plt.xlabel("Translation Step")
+    plt.ylabel("Similarity to Original")
+    plt.title("Weird Translator: Textual and Semantic Change Over Steps")
+    plt.legend()
+    plt.grid(True)
+    if path is None:
+        plt.show()
+    else:
+        plt.savefig(path, dpi=120, bbox_inches="tight")
+        plt.close()
+
+# Per-step metrics as CSV and JSON
+def save_metrics(output_dir, langs, translations, text_sims, semantic_sims):
+    rows = []
+    for i, (t, ts, ss) in enumerate(zip(translations, text_sims, semantic_sims)):
+        lang = langs[i - 1] if i > 0 else None
+        rows.append({"step": i, "lang": lang, "language": LANGUAGES.get(lang) if lang else "original",
+                     "text": t, "textual_similarity": ts, "semantic_similarity": ss})
+    with open(os.path.join(output_dir, "metrics.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(output_dir, "metrics.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Weird translator: translation drift over random language chains.")
+    parser.add_argument("--text", help="text to translate (asked interactively if omitted)")
+    parser.add_argument("--steps", type=int, default=15, help="number of random languages before English")
+    parser.add_argument("--seed", type=int, help="seed for the language sequence")
+    parser.add_argument("--headless", action="store_true", help="write the plot and metrics to files instead of showing a window")
+    parser.add_argument("--output-dir", default=".", help="where --headless writes similarity.png, metrics.csv and metrics.json")
+    parser.add_argument("--cache", default="translation_cache.sqlite", help="translation cache file ('' disables it)")
+    args = parser.parse_args()
+
+    text = args.text if args.text is not None else input("Enter text: ")
+    rng = random.Random(args.seed)
+    langs = random_languages(args.steps, rng)
+    cache = TranslationCache(args.cache) if args.cache else None
+    translations = weird_translate(text, cache=cache, langs=langs)
+
+    # Compute similarities
+    text_sims = [textual_similarity(text, t) for t in translations]
+    semantic_sims = semantic_similarities(text, translations).tolist()
+
+    print(f"Textual similarity after final translation: {text_sims[-1]:.4f}")
+    print(f"Semantic similarity after final translation: {semantic_sims[-1]:.4f}")
+
+    if args.headless:
+        os.makedirs(args.output_dir, exist_ok=True)
+        plot_similarities(text_sims, semantic_sims, os.path.join(args.output_dir, "similarity.png"))
+        save_metrics(args.output_dir, langs, translations, text_sims, semantic_sims)
+        print("Saved plot and metrics to", args.output_dir)
+    else:
+        plot_similarities(text_sims, semantic_sims)
+
+if __name__ == "__main__":
+    main()
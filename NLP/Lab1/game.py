@@ -1,6 +1,12 @@
 import tkinter as tk
 from tkinter import messagebox
-from logic import get_random_word, get_score
+from concurrent.futures import ThreadPoolExecutor
+from logic import get_random_word, get_score, closest_words, warm_up
+
+# WordNet work runs on a background thread; Tk is only touched from the main thread,
+# which polls the futures with root.after. One worker only: NLTK's WordNet reader shares
+# file positions between calls and is not thread-safe
+POLL_MS = 30
 
 class WordGame:
     def __init__(self, root):
@@ -8,16 +14,60 @@ class WordGame:
         self.root.title("Word Association Game")
         self.root.geometry("500x400")
         self.root.config(bg="#f8f9fa")
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         self.max_rounds = 10
         self.current_round = 1
         self.score_total = 0
 
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.next_word = None
+
+        self.loading_label = tk.Label(self.root, text="Loading WordNet...", font=("Arial", 12, "italic"), bg="#f8f9fa")
+        self.loading_label.pack(expand=True)
+        self.run_async(self.load_first_word, self.start_game, on_error=self.load_failed)
+
+    # Run fn on the pool and call on_done(result) on the Tk thread when it finishes,
+    # or on_error() after reporting the exception
+    def run_async(self, fn, on_done, *args, on_error=None):
+        self.when_done(self.executor.submit(fn, *args), on_done, on_error)
+
+    def when_done(self, future, on_done, on_error=None):
+        def poll():
+            if not future.done():
+                self.root.after(POLL_MS, poll)
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                messagebox.showerror("Error", str(e))
+                if on_error:
+                    on_error()
+                return
+            on_done(result)
+
+        self.root.after(POLL_MS, poll)
+
+    def load_first_word(self):
+        warm_up()
+        return get_random_word()
+
+    def load_failed(self):
+        self.loading_label.config(text="Could not load WordNet.")
+
+    def start_game(self, word):
+        self.loading_label.destroy()
+        self.word, self.pos, self.definition = word
         self.create_game_screen()
+        self.prefetch_next_word()
+
+    # The next round's word is picked while the player is still typing
+    def prefetch_next_word(self):
+        if self.current_round < self.max_rounds:
+            self.next_word = self.executor.submit(get_random_word)
 
     def create_game_screen(self):
         self.user_word = tk.StringVar()
-        self.word, self.pos, self.definition = get_random_word()
 
         tk.Label(self.root, text="Word Association Game", font=("Arial", 16, "bold"), bg="#f8f9fa").pack(pady=10)
         self.round_label = tk.Label(self.root, text=f"Round {self.current_round} of {self.max_rounds}", bg="#f8f9fa", font=("Arial", 12))
@@ -32,21 +82,56 @@ class WordGame:
         tk.Label(self.root, text="Type a related word:", bg="#f8f9fa").pack()
         entry = tk.Entry(self.root, textvariable=self.user_word, width=25)
         entry.pack(pady=10)
+        entry.bind("<Return>", lambda event: self.check_word())
         entry.focus()
 
-        tk.Button(self.root, text="Submit", command=self.check_word, bg="#28a745", fg="white", relief="flat", padx=10, pady=5).pack(pady=5)
+        self.submit_button = tk.Button(self.root, text="Submit", command=self.check_word, bg="#28a745", fg="white", relief="flat", padx=10, pady=5)
+        self.submit_button.pack(pady=5)
+        self.hint_button = tk.Button(self.root, text="Hint", command=self.show_hint, bg="#17a2b8", fg="white", relief="flat", padx=10, pady=5)
+        self.hint_button.pack(pady=5)
 
         self.score_label = tk.Label(self.root, text="Score: 0", bg="#f8f9fa", font=("Arial", 10, "italic"))
         self.score_label.pack(pady=5)
 
+    def show_hint(self):
+        self.hint_button.config(state="disabled", text="Finding hints...")
+        hint_round = self.current_round
+        self.run_async(closest_words, lambda hints: self.hint_ready(hints, hint_round), self.word, self.pos, 5,
+                       on_error=self.restore_hint_button)
+
+    def restore_hint_button(self):
+        self.hint_button.config(state="normal", text="Hint")
+
+    # Hints for a round that is already over are dropped
+    def hint_ready(self, hints, hint_round):
+        self.restore_hint_button()
+        if hint_round != self.current_round:
+            return
+        if not hints:
+            messagebox.showinfo("Hint", "No hints for this word.")
+            return
+        lines = "\n".join(f"{word} ({score})" for word, score in hints)
+        messagebox.showinfo("Hint", f"Closest related words:\n\n{lines}")
+
     def check_word(self):
+        if str(self.submit_button["state"]) == "disabled":
+            return
         user_input = self.user_word.get().strip().lower()
         if not user_input:
             messagebox.showwarning("Warning", "Please enter a word!")
             return
 
-        score, feedback = get_score(self.word, user_input, self.pos)
+        self.submit_button.config(state="disabled", text="Scoring...")
+        self.run_async(get_score, self.score_ready, self.word, user_input, self.pos,
+                       on_error=self.restore_submit_button)
+
+    def restore_submit_button(self):
+        self.submit_button.config(state="normal", text="Submit")
+
+    def score_ready(self, result):
+        score, feedback = result
         self.score_total += score
+        self.restore_submit_button()
 
         messagebox.showinfo("Result", f"Round {self.current_round} of {self.max_rounds}\n"
                                       f"Similarity Score: {score}\n\n{feedback}")
@@ -57,11 +142,37 @@ class WordGame:
             self.round_label.config(text=f"Round {self.current_round} of {self.max_rounds}")
             avg = round(self.score_total / (self.current_round - 1), 2)
             self.score_label.config(text=f"Total Score: {round(self.score_total, 2)} (Avg: {avg})")
+            self.next_round()
         else:
             avg_final = round(self.score_total / self.max_rounds, 2)
             messagebox.showinfo("Game Over", f"Game Over!\n\nYour total score: {round(self.score_total, 2)}\n"
                                              f"Average similarity: {avg_final}")
-            self.root.destroy()
+            self.close()
+
+    # Show the prefetched word; only waits if the prefetch has not finished yet
+    def next_round(self):
+        future, self.next_word = self.next_word, None
+        if future.done() and future.exception() is None:
+            self.show_word(future.result())
+        else:
+            self.submit_button.config(state="disabled")
+            self.when_done(future, self.show_word, on_error=self.prefetch_failed)
+
+    # Keep the current word and try the prefetch again
+    def prefetch_failed(self):
+        self.restore_submit_button()
+        self.prefetch_next_word()
+
+    def show_word(self, word):
+        self.word, self.pos, self.definition = word
+        self.word_label.config(text=f"Your word: {self.word}")
+        self.definition_label.config(text=f"Definition: {self.definition}")
+        self.restore_submit_button()
+        self.prefetch_next_word()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
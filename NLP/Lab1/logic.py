@@ -1,14 +1,20 @@
 import nltk
 from nltk.corpus import wordnet as wn
-import random
+from nltk.corpus.reader.wordnet import WordNetError
+import math
+import threading
+from functools import lru_cache
+from wordnet_index import load_index
+from taxonomy import load_taxonomy
 
 # nltk.download('wordnet')
 # nltk.download('omw-1.4')
 
+@lru_cache(maxsize=65536)
 def get_synset(word, pos='n'):
     try:
         return wn.synset(f"{word}.{pos}.01")
-    except:
+    except (WordNetError, ValueError):
         synsets = wn.synsets(word)
         if synsets:
             return synsets[0]
@@ -36,6 +42,7 @@ def get_feedback(score):
     else:
         return "Not related at all!"
 
+@lru_cache(maxsize=4096)
 def get_relations(word, pos='n'):
     syn = get_synset(word, pos)
     if not syn:
@@ -57,9 +64,77 @@ def get_score(word1, word2, pos='n'):
     feedback = get_feedback(sim)
     return score, feedback
 
-def get_random_word():
-    synset = random.choice(list(wn.all_synsets()))
-    name = synset.name().split(".")[0]
-    pos = synset.pos()
-    definition = synset.definition()
-    return name, pos, definition
+# Memory-mapped synset index (see wordnet_index.py), built on first use and shared by all rounds
+_word_index = None
+_word_index_lock = threading.Lock()
+
+def get_word_index():
+    global _word_index
+    if _word_index is None:
+        with _word_index_lock:
+            if _word_index is None:
+                _word_index = load_index()
+    return _word_index
+
+# Random synset in O(1), optionally restricted to a POS ('n', 'v', 'a', 's', 'r') and a depth range
+def get_random_word(pos=None, min_depth=None, max_depth=None):
+    index = get_word_index()
+    i = index.sample(pos, min_depth, max_depth)
+    name = index.name(i).rsplit(".", 2)[0]
+    return name, index.pos(i), index.definition(i)
+
+
+# Hypernym taxonomy for one-vs-many Wu-Palmer scoring (see taxonomy.py), built on first use
+_taxonomy = None
+_taxonomy_lock = threading.Lock()
+
+def get_taxonomy():
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = load_taxonomy(index=get_word_index())
+    return _taxonomy
+
+# The top_n words closest to `word`, as (word, score) with scores on the get_score scale
+def closest_words(word, pos='n', top_n=10):
+    syn = get_synset(word, pos)
+    if not syn:
+        return []
+    taxonomy = get_taxonomy()
+    target = taxonomy.synset_id(syn.name())
+    candidates = taxonomy.ids_for_pos("as" if syn.pos() in "as" else syn.pos())
+    own = {lemma.lower() for lemma in syn.lemma_names()} | {word.lower()}
+
+    words = []
+    seen = set(own)
+    # Several synsets share a word; ask for extra so top_n distinct words remain
+    for i, sim in taxonomy.closest(target, top_n * 5, candidates):
+        name = taxonomy.index.name(i).rsplit(".", 2)[0]
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            words.append((name.replace("_", " "), round(sim * 100, 2)))
+        if len(words) == top_n:
+            break
+    return words
+
+# Scores of many guesses against one word in a single call, best first (for leaderboards)
+def rank_words(word, guesses, pos='n'):
+    syn = get_synset(word, pos)
+    if not syn:
+        return [(g, 0) for g in guesses]
+    taxonomy = get_taxonomy()
+    guess_synsets = [get_synset(g, pos) for g in guesses]
+    known = [i for i, g in enumerate(guess_synsets) if g]
+    sims = taxonomy.wup_many(taxonomy.synset_id(syn.name()),
+                             [taxonomy.synset_id(guess_synsets[i].name()) for i in known])
+    scores = [0] * len(guesses)
+    for i, sim in zip(known, sims):
+        scores[i] = 0 if math.isnan(sim) else round(float(sim) * 100, 2)
+    return sorted(zip(guesses, scores), key=lambda x: -x[1])
+
+# Load WordNet and the word index up front so the first round does not pay for it
+def warm_up():
+    wn.ensure_loaded()
+    get_word_index()
+    get_synset("entity")
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+
+from wordnet_index import POS_TAGS, load_index
+
+# Precomputed WordNet hypernym taxonomy for scoring one synset against many at once.
+# Synsets use the ids of the word index (wordnet_index.py). For every synset the file keeps
+# min/max depth, the longest of its shortest paths to an ancestor (where NLTK's simulated root
+# sits), and all of its ancestors (itself included) with their shortest distances, in CSR form
+# sorted by ancestor id.
+#
+# wup_many reproduces Synset.wup_similarity (simulate_root=True) exactly:
+#   - the LCS is the common ancestor of greatest min depth, ties going to the first by name,
+#     unless the target itself is one of them
+#   - when either synset is not a noun a fake *ROOT* of depth 0 joins the candidates and takes
+#     part in the name tie-break at depth 0
+#   - depth = max_depth(LCS) + 1 and each side's length is the shortest path through any common
+#     ancestor of that side and the LCS (the fake root counting as one more than the deepest)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordnet_taxonomy.npz")
+FAKE_ROOT = -1
+
+
+def build_taxonomy(path=DEFAULT_PATH, index=None):
+    from nltk.corpus import wordnet as wn
+
+    index = index or load_index()
+    n = len(index)
+    names = [index.name(i) for i in range(n)]
+    ids = {name: i for i, name in enumerate(names)}
+
+    parents = [()] * n
+    for syn in wn.all_synsets():
+        hypernyms = syn.hypernyms() + syn.instance_hypernyms()
+        parents[ids[syn.name()]] = tuple(ids[h.name()] for h in hypernyms)
+
+    # Ancestor distances and depths, memoized parent by parent (the hypernym graph is a DAG)
+    ancestors = [None] * n
+    min_depth = np.zeros(n, dtype=np.int16)
+    max_depth = np.zeros(n, dtype=np.int16)
+
+    def visit(i):
+        stack = [i]
+        while stack:
+            j = stack[-1]
+            pending = [p for p in parents[j] if ancestors[p] is None]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if ancestors[j] is not None:
+                continue
+            dist = {j: 0}
+            for p in parents[j]:
+                for a, d in ancestors[p].items():
+                    if d + 1 < dist.get(a, n):
+                        dist[a] = d + 1
+            ancestors[j] = dist
+            if parents[j]:
+                min_depth[j] = 1 + min(min_depth[p] for p in parents[j])
+                max_depth[j] = 1 + max(max_depth[p] for p in parents[j])
+
+    for i in range(n):
+        if ancestors[i] is None:
+            visit(i)
+
+    anc_ptr = np.zeros(n + 1, dtype=np.int64)
+    anc_ptr[1:] = np.cumsum([len(a) for a in ancestors])
+    anc_ids = np.empty(anc_ptr[-1], dtype=np.int32)
+    anc_dist = np.empty(anc_ptr[-1], dtype=np.int16)
+    eccentricity = np.zeros(n, dtype=np.int16)
+    for i, dist in enumerate(ancestors):
+        items = sorted(dist.items())
+        anc_ids[anc_ptr[i]:anc_ptr[i + 1]] = [a for a, _ in items]
+        anc_dist[anc_ptr[i]:anc_ptr[i + 1]] = [d for _, d in items]
+        eccentricity[i] = max(dist.values())
+
+    name_rank = np.empty(n, dtype=np.int32)
+    name_rank[sorted(range(n), key=names.__getitem__)] = np.arange(n, dtype=np.int32)
+    root_rank = sum(name < "*ROOT*" for name in names)  # where the fake root falls in name order
+    pos = np.array([POS_TAGS.index(index.pos(i)) for i in range(n)], dtype=np.uint8)
+
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, count=np.array(n), wordnet_files=np.array(json.dumps(index.wordnet_files)),
+             min_depth=min_depth, max_depth=max_depth, eccentricity=eccentricity,
+             anc_ptr=anc_ptr, anc_ids=anc_ids, anc_dist=anc_dist, name_rank=name_rank,
+             root_rank=np.array(root_rank), pos=pos)
+    os.replace(tmp, path)
+    return path
+
+
+# Flattened CSR segments of `rows`: (position of the row in `rows`, index into the data arrays)
+def _segments(ptr, rows):
+    starts = ptr[rows]
+    sizes = ptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), sizes)
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return owner, np.repeat(starts, sizes) + offsets
+
+
+class Taxonomy:
+    def __init__(self, path=DEFAULT_PATH, index=None):
+        data = np.load(path)
+        self.index = index or load_index()
+        same_files = str(data["wordnet_files"]) == json.dumps(self.index.wordnet_files)
+        if int(data["count"]) != len(self.index) or not same_files:
+            raise ValueError(f"{path} does not match the word index")
+        self.min_depth = data["min_depth"].astype(np.int64)
+        self.max_depth = data["max_depth"].astype(np.int64)
+        self.eccentricity = data["eccentricity"].astype(np.int64)
+        self.anc_ptr = data["anc_ptr"]
+        self.anc_ids = data["anc_ids"].astype(np.int64)
+        self.anc_dist = data["anc_dist"].astype(np.int64)
+        self.name_rank = data["name_rank"]
+        self.root_rank = int(data["root_rank"])
+        self.pos = data["pos"]
+        self._ids = None
+
+    def __len__(self):
+        return len(self.min_depth)
+
+    def synset_id(self, name):
+        if self._ids is None:
+            self._ids = {self.index.name(i): i for i in range(len(self))}
+        return self._ids.get(name)
+
+    def ids_for_pos(self, pos):
+        codes = [POS_TAGS.index(p) for p in pos]
+        return np.flatnonzero(np.isin(self.pos, codes))
+
+    # For every pair (x[i], s[i]) with s[i] an ancestor of x[i]: NLTK's shortest_path_distance,
+    # with the fake root added where simulate_root[i]
+    def _path_lengths(self, x, s, simulate_root):
+        length = np.zeros(len(x), dtype=np.int64)
+        todo = np.flatnonzero(x != s)
+        fake = todo[s[todo] == FAKE_ROOT]
+        length[fake] = self.eccentricity[x[fake]] + 1
+        real = todo[s[todo] != FAKE_ROOT]
+        if not len(real):
+            return length
+
+        # Common ancestors of x and s are the ancestors of s; look each one up among x's ancestors
+        x_owner, x_at = _segments(self.anc_ptr, x[real])
+        keys = x_owner * len(self) + self.anc_ids[x_at]  # sorted: rows in order, ids sorted per row
+        s_owner, s_at = _segments(self.anc_ptr, s[real])
+        found = np.searchsorted(keys, s_owner * len(self) + self.anc_ids[s_at])
+        total = self.anc_dist[x_at[found]] + self.anc_dist[s_at]
+
+        best = np.full(len(real), np.iinfo(np.int64).max)
+        np.minimum.at(best, s_owner, total)
+        via_root = self.eccentricity[x[real]] + self.eccentricity[s[real]] + 2
+        length[real] = np.where(simulate_root[real], np.minimum(best, via_root), best)
+        return length
+
+    # Wu-Palmer similarity of synset `target` with every synset in `candidates`
+    # (NaN where NLTK returns None)
+    def wup_many(self, target, candidates):
+        candidates = np.asarray(candidates, dtype=np.int64)
+        m = len(candidates)
+        need_root = (self.pos[target] != 0) | (self.pos[candidates] != 0)
+
+        # Target ancestors as a dense lookup: ancestor id -> distance, -1 elsewhere
+        lo, hi = self.anc_ptr[target], self.anc_ptr[target + 1]
+        target_dist = np.full(len(self), -1, dtype=np.int64)
+        target_dist[self.anc_ids[lo:hi]] = self.anc_dist[lo:hi]
+
+        owner, at = _segments(self.anc_ptr, candidates)
+        common = self.anc_ids[at]
+        keep = target_dist[common] >= 0
+        owner, common = owner[keep], common[keep]
+
+        # LCS: greatest min depth, then the target itself, then the smallest name
+        order = np.lexsort((self.name_rank[common], common != target, -self.min_depth[common],
+                            owner))
+        owner, common = owner[order], common[order]
+        if len(owner):
+            first = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+        else:
+            first = np.empty(0, dtype=np.int64)
+        subsumer = np.full(m, FAKE_ROOT, dtype=np.int64)
+        has_common = np.zeros(m, dtype=bool)
+        subsumer[owner[first]] = common[first]
+        has_common[owner[first]] = True
+
+        # The fake root ties with real roots at depth 0 and usually wins on name,
+        # but never over the target
+        real = np.maximum(subsumer, 0)
+        lcs_depth = np.where(has_common, self.min_depth[real], -1)
+        to_fake = need_root & (lcs_depth <= 0) & (subsumer != target)
+        to_fake &= ~has_common | (self.name_rank[real] >= self.root_rank)
+        subsumer[to_fake] = FAKE_ROOT
+        valid = has_common | need_root
+
+        depth = np.where(subsumer == FAKE_ROOT, 0, self.max_depth[np.maximum(subsumer, 0)]) + 1
+        targets = np.full(m, target, dtype=np.int64)
+        len1 = self._path_lengths(targets[valid], subsumer[valid], need_root[valid])
+        len2 = self._path_lengths(candidates[valid], subsumer[valid], need_root[valid])
+
+        scores = np.full(m, np.nan)
+        scores[valid] = 2.0 * depth[valid] / (len1 + len2 + 2 * depth[valid])
+        return scores
+
+    # The top_n synsets closest to `target` as (synset id, score), best first
+    def closest(self, target, top_n=10, candidates=None, exclude=()):
+        if candidates is None:
+            candidates = np.arange(len(self))
+        candidates = np.setdiff1d(candidates, np.r_[target, list(exclude)].astype(np.int64))
+        scores = np.nan_to_num(self.wup_many(target, candidates), nan=0.0)
+        top = np.argsort(-scores, kind="stable")[:top_n]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+
+# Open the taxonomy, building it first when it is missing or does not match the index
+# (size or WordNet data files)
+def load_taxonomy(path=DEFAULT_PATH, index=None, rebuild=False):
+    if not rebuild:
+        try:
+            return Taxonomy(path, index)
+        except (OSError, ValueError, KeyError):
+            pass
+    build_taxonomy(path, index)
+    return Taxonomy(path, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the WordNet taxonomy and time one-vs-many Wu-Palmer scoring.")
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--target", default="dog.n.01")
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    taxonomy = load_taxonomy(args.path, rebuild=args.rebuild)
+    loaded = time.perf_counter()
+    target = taxonomy.synset_id(args.target)
+    candidates = taxonomy.ids_for_pos(taxonomy.index.pos(target))
+    taxonomy.wup_many(target, candidates)
+    scored = time.perf_counter()
+
+    print(f"load {1000 * (loaded - start):.0f} ms, {len(candidates)} candidates scored in "
+          f"{1000 * (scored - loaded):.0f} ms")
+    for i, score in taxonomy.closest(target, args.top_n, candidates):
+        print(f"{score:.3f}  {taxonomy.index.name(i)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import mmap
+import time
+import random
+import struct
+import argparse
+from array import array
+
+# Compact on-disk index of WordNet synsets (name, POS, min depth, definition) for random word picks.
+# Entries are sorted by (POS, depth), so every POS/depth filter is a handful of contiguous ranges
+# and sampling is O(1). The file is memory-mapped: names and definitions are decoded only for
+# the entry that is picked, and processes using the same index share its pages.
+#
+# Layout: MAGIC, header length (uint32), JSON header, then 8-byte aligned sections
+#   name_offsets, def_offsets  uint32[n + 1]  byte ranges into the blobs
+#   pos, depth                 uint8[n]
+#   buckets                    uint32[len(POS_TAGS) * (max_depth + 1) + 1]
+#                              start of every (POS, depth) run
+#   names, definitions         UTF-8 blobs
+#
+# The index is built on first use, and rebuilt when the WordNet data files it was built from
+# (path, size, mtime) have changed. The check stats the files; it never loads the corpus reader.
+
+MAGIC = b"WNIX"
+INDEX_VERSION = 2
+POS_TAGS = "nvasr"
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordnet.idx")
+WORDNET_FILES = ["data.noun", "data.verb", "data.adj", "data.adv"]
+
+
+# [path, size, mtime_ns] of the installed WordNet data files (of wordnet.zip when zipped)
+def wordnet_stamp():
+    import nltk.data
+
+    root = nltk.data.find("corpora/wordnet")
+    if hasattr(root, "zipfile"):
+        paths = [root.zipfile.filename]
+    else:
+        paths = [root.join(name).path for name in WORDNET_FILES]
+    stamp = []
+    for path in paths:
+        st = os.stat(path)
+        stamp.append([os.path.abspath(path), st.st_size, st.st_mtime_ns])
+    return stamp
+
+
+def _blob(strings):
+    offsets = array("I", [0])
+    parts = []
+    for s in strings:
+        b = s.encode("utf-8")
+        parts.append(b)
+        offsets.append(offsets[-1] + len(b))
+    return offsets, b"".join(parts)
+
+
+def build_index(path=DEFAULT_PATH):
+    from nltk.corpus import wordnet as wn
+
+    entries = [(POS_TAGS.index(syn.pos()), min(syn.min_depth(), 255), syn.name(), syn.definition())
+               for syn in wn.all_synsets()]
+    entries.sort(key=lambda e: (e[0], e[1]))  # stable: WordNet order inside a bucket
+    max_depth = max(e[1] for e in entries)
+
+    buckets = array("I", [0] * (len(POS_TAGS) * (max_depth + 1) + 1))
+    for pos, depth, _, _ in entries:
+        buckets[pos * (max_depth + 1) + depth + 1] += 1
+    for i in range(1, len(buckets)):
+        buckets[i] += buckets[i - 1]
+
+    name_offsets, names = _blob(e[2] for e in entries)
+    def_offsets, definitions = _blob(e[3] for e in entries)
+    sections = [
+        ("name_offsets", name_offsets.tobytes()),
+        ("def_offsets", def_offsets.tobytes()),
+        ("pos", bytes(e[0] for e in entries)),
+        ("depth", bytes(e[1] for e in entries)),
+        ("buckets", buckets.tobytes()),
+        ("names", names),
+        ("definitions", definitions),
+    ]
+
+    header = {"version": INDEX_VERSION, "wordnet": wn.get_version(),
+              "wordnet_files": wordnet_stamp(), "count": len(entries), "max_depth": max_depth,
+              "byteorder": sys.byteorder, "sections": {}}
+    # Section offsets are relative to the 8-byte aligned end of the header
+    offset = 0
+    for name, data in sections:
+        header["sections"][name] = [offset, len(data)]
+        offset += len(data) + (-len(data) % 8)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = len(MAGIC) + 4 + len(header_bytes)
+    data_start += -data_start % 8
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for _, data in sections:
+            f.write(data + b"\0" * (-len(data) % 8))
+    os.replace(tmp, path)
+    return path
+
+
+class WordNetIndex:
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if mm[:4] != MAGIC:
+            raise ValueError(f"{path} is not a WordNet index")
+        (header_len,) = struct.unpack("<I", mm[4:8])
+        header = json.loads(mm[8:8 + header_len])
+        if header["version"] != INDEX_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built by another index version or on another platform")
+
+        data_start = 8 + header_len
+        data_start += -data_start % 8
+        view = memoryview(mm)
+
+        def section(name):
+            start, length = header["sections"][name]
+            return view[data_start + start:data_start + start + length]
+
+        self.wordnet_version = header["wordnet"]
+        self.wordnet_files = header["wordnet_files"]
+        self.count = header["count"]
+        self.max_depth = header["max_depth"]
+        self._name_offsets = section("name_offsets").cast("I")
+        self._def_offsets = section("def_offsets").cast("I")
+        self._pos = section("pos")
+        self._depth = section("depth")
+        self._buckets = section("buckets").cast("I")
+        self._names = section("names")
+        self._definitions = section("definitions")
+        self._ranges = {}
+
+    def __len__(self):
+        return self.count
+
+    def name(self, i):
+        return bytes(self._names[self._name_offsets[i]:self._name_offsets[i + 1]]).decode("utf-8")
+
+    def definition(self, i):
+        start, end = self._def_offsets[i], self._def_offsets[i + 1]
+        return bytes(self._definitions[start:end]).decode("utf-8")
+
+    def pos(self, i):
+        return POS_TAGS[self._pos[i]]
+
+    def depth(self, i):
+        return self._depth[i]
+
+    # (synset name, pos, depth, definition)
+    def entry(self, i):
+        return self.name(i), self.pos(i), self.depth(i), self.definition(i)
+
+    # Contiguous index ranges matching the filters, computed once per filter combination
+    def ranges(self, pos=None, min_depth=None, max_depth=None):
+        key = (pos, min_depth, max_depth)
+        if key not in self._ranges:
+            lo = max(0, min_depth or 0)
+            hi = self.max_depth if max_depth is None else min(max_depth, self.max_depth)
+            width = self.max_depth + 1
+            ranges = []
+            for p in (POS_TAGS if pos is None else pos):
+                if lo > hi:
+                    break
+                base = POS_TAGS.index(p) * width
+                start, end = self._buckets[base + lo], self._buckets[base + hi + 1]
+                if end > start:
+                    ranges.append((start, end))
+            self._ranges[key] = ranges
+        return self._ranges[key]
+
+    # Uniform random entry among those matching the filters; pos may be one tag or several ("as")
+    def sample(self, pos=None, min_depth=None, max_depth=None, rng=random):
+        ranges = self.ranges(pos, min_depth, max_depth)
+        total = sum(end - start for start, end in ranges)
+        if not total:
+            raise ValueError("no synset matches the filters")
+        r = rng.randrange(total)
+        for start, end in ranges:
+            if r < end - start:
+                return start + r
+            r -= end - start
+
+    def close(self):
+        for view in (self._name_offsets, self._def_offsets, self._pos, self._depth, self._buckets,
+                     self._names, self._definitions):
+            view.release()
+        self._mm.close()
+
+
+# Open the index, building it first when it is missing, unreadable or built from other WordNet files
+def load_index(path=DEFAULT_PATH, rebuild=False):
+    if not rebuild:
+        try:
+            index = WordNetIndex(path)
+        except (OSError, ValueError):
+            pass
+        else:
+            if index.wordnet_files == wordnet_stamp():
+                return index
+            index.close()
+    build_index(path)
+    return WordNetIndex(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the WordNet index and time random picks.")
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--samples", type=int, default=100000)
+    args = parser.parse_args()
+
+    load_index(args.path, args.rebuild).close()
+    start = time.perf_counter()
+    index = WordNetIndex(args.path)
+    loaded = time.perf_counter()
+    for _ in range(args.samples):
+        index.entry(index.sample())
+    sampled = time.perf_counter()
+
+    size_mb = os.path.getsize(args.path) / 2**20
+    print(f"{len(index)} synsets (WordNet {index.wordnet_version}), {size_mb:.1f} MB, "
+          f"load {1000 * (loaded - start):.1f} ms, "
+          f"{1e6 * (sampled - loaded) / args.samples:.1f} us per random pick")
+
+
+if __name__ == "__main__":
+    main()
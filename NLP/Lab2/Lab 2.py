@@ -1,76 +1,197 @@
 import torch
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
-import re
+from transformers import GPT2LMHeadModel, GPT2Tokenizer, StoppingCriteria, StoppingCriteriaList
+import string
+
+try:
+    from transformers.pytorch_utils import Conv1D
+except ImportError:  # transformers < 4.21
+    from transformers.modeling_utils import Conv1D
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
-def load_gpt2():
+# Optimized mode: int8 dynamic quantization of the Linear layers, no autograd, tuned thread
+# counts. Quantized kernels are CPU only, so the model is kept on the CPU in that mode.
+def load_gpt2(optimized=False, num_threads=None, interop_threads=None):
     tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
-    model = GPT2LMHeadModel.from_pretrained("gpt2").to(device).eval()
+    if optimized:
+        set_cpu_threads(num_threads, interop_threads)
+        model = optimize_for_cpu(GPT2LMHeadModel.from_pretrained("gpt2").eval())
+    else:
+        model = GPT2LMHeadModel.from_pretrained("gpt2").to(device).eval()
 
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
         tokenizer.pad_token_id = tokenizer.eos_token_id
+    # GPT-2 continues from the right end, so batches are padded on the left
+    tokenizer.padding_side = "left"
     return tokenizer, model
 
 
-# Generate the exact number of words
-def generate_next_words(model, tokenizer, text, num_words=2, top_k=50, top_p=0.95):
-    input_ids = tokenizer.encode(text, return_tensors="pt").to(device)
-    attention_mask = torch.ones_like(input_ids).to(device)
-    generated = text
-    collected = []
-
-    while len(collected) < num_words:
-        out = model.generate(
-            input_ids,
-            max_new_tokens=1,
-            do_sample=True,
-            top_k=top_k,
-            top_p=top_p,
-            pad_token_id=tokenizer.eos_token_id,
-            attention_mask=attention_mask
-        )
-        # Decode and take the new part
-        new_text = tokenizer.decode(out[0], skip_special_tokens=True)
-        frag = new_text[len(generated):].strip()
-
-        # Extract full words
-        words = re.findall(r'(?<=\s)[A-Za-z\'-]+', " " + frag)
-        for w in words:
-            if len(collected) < num_words:
-                collected.append(w)
-
-        # Update context
-        generated = new_text
-        input_ids = tokenizer.encode(generated, return_tensors="pt").to(device)
-        attention_mask = torch.ones_like(input_ids).to(device)
-
-    return " ".join(collected)
+# Intra-op and inter-op thread pools; the inter-op size can only be set before torch first uses it
+def set_cpu_threads(num_threads=None, interop_threads=None):
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
+
+
+# GPT-2 keeps its attention/MLP projections in transformers' Conv1D (x @ W + b), which
+# dynamic quantization skips, so they are replaced by the equivalent nn.Linear first
+def conv1d_to_linear(model):
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data.clone()
+                setattr(module, name, linear)
+    return model
+
+
+def optimize_for_cpu(model):
+    model = conv1d_to_linear(model.cpu().eval())
+    model.requires_grad_(False)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+WORD_CHARS = frozenset(string.ascii_letters + "'-")
+
+# Collects whole words ([A-Za-z'-]+ runs starting after whitespace) from text arriving piece by piece.
+# A word counts only once the character after it has arrived.
+class WordCollector:
+    def __init__(self, after_space=True):
+        self.words = []
+        self.current = None
+        self.after_space = after_space
+
+    def feed(self, piece):
+        for ch in piece:
+            if ch in WORD_CHARS:
+                if self.current is not None:
+                    self.current += ch
+                elif self.after_space:
+                    self.current = ch
+                self.after_space = False
+            else:
+                if self.current is not None:
+                    self.words.append(self.current)
+                    self.current = None
+                self.after_space = ch.isspace()
+        return len(self.words)
+
+    # End of text also ends the word in progress
+    def finish(self):
+        if self.current is not None:
+            self.words.append(self.current)
+            self.current = None
+        return self.words
+
+
+# Keep only the top-k / nucleus (top-p) part of the next-token distribution
+def top_k_top_p_filter(logits, top_k=50, top_p=0.95):
+    if top_k and top_k > 0:
+        top_k = min(top_k, logits.size(-1))
+        kth = torch.topk(logits, top_k).values[..., -1, None]
+        logits = logits.masked_fill(logits < kth, float("-inf"))
+    if top_p is not None and top_p < 1.0:
+        sorted_logits, sorted_idx = torch.sort(logits, descending=True)
+        sorted_probs = torch.softmax(sorted_logits, dim=-1)
+        # Drop tokens once the mass before them exceeds top_p; the best token always stays
+        remove = sorted_probs.cumsum(dim=-1) - sorted_probs > top_p
+        logits = logits.masked_fill(remove.scatter(-1, sorted_idx, remove), float("-inf"))
+    return logits
+
+
+# Generate the exact number of words.
+# Incremental decoding: the prompt runs through the model once, then each step feeds only the
+# sampled token together with the cached keys/values, and words are cut from the new token text.
+@torch.inference_mode()
+def generate_next_words(model, tokenizer, text, num_words=2, top_k=50, top_p=0.95, max_new_tokens=None):
+    if max_new_tokens is None:
+        max_new_tokens = 8 * num_words + 16
+    input_ids = tokenizer.encode(text, return_tensors="pt").to(model.device)
+    collector = WordCollector(after_space=not text or text[-1].isspace())
+    past_key_values = None
+
+    for _ in range(max_new_tokens):
+        out = model(input_ids=input_ids, past_key_values=past_key_values, use_cache=True)
+        past_key_values = out.past_key_values
+
+        logits = top_k_top_p_filter(out.logits[:, -1, :], top_k=top_k, top_p=top_p)
+        next_token = torch.multinomial(torch.softmax(logits, dim=-1), num_samples=1)
+        if next_token.item() == tokenizer.eos_token_id:
+            break
+
+        if collector.feed(tokenizer.decode(next_token[0])) >= num_words:
+            break
+        input_ids = next_token
+
+    return " ".join(collector.finish()[:num_words])
+
+
+# Stops generation once every sequence has num_words whole words (or has ended with EOS)
+class WholeWordsCriteria(StoppingCriteria):
+    def __init__(self, tokenizer, prompt_len, num_words, after_space):
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self.num_words = num_words
+        self.collectors = [WordCollector(a) for a in after_space]
+        self.done = [False] * len(after_space)
+        self.seen = prompt_len
+
+    def __call__(self, input_ids, scores, **kwargs):
+        # Only the tokens added since the previous call are decoded
+        new_tokens = input_ids[:, self.seen:].tolist()
+        self.seen = input_ids.shape[1]
+        for i, tokens in enumerate(new_tokens):
+            if self.done[i]:
+                continue
+            if self.tokenizer.eos_token_id in tokens:
+                self.done[i] = True
+            elif self.collectors[i].feed(self.tokenizer.decode(tokens)) >= self.num_words:
+                self.done[i] = True
+        return all(self.done)
+
+
+# k sampled continuations of num_words words for each prompt, in one left-padded generate call.
+# Returns one list of num_samples strings per prompt.
+@torch.inference_mode()
+def generate_batch(model, tokenizer, prompts, num_words=2, num_samples=3, max_new_tokens=20, top_k=50, top_p=0.95):
+    enc = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+    prompt_len = enc["input_ids"].shape[1]
+    after_space = [not p or p[-1].isspace() for p in prompts for _ in range(num_samples)]
+
+    out = model.generate(
+        **enc,
+        max_new_tokens=max_new_tokens,
+        do_sample=True,
+        top_k=top_k,
+        top_p=top_p,
+        num_return_sequences=num_samples,
+        pad_token_id=tokenizer.eos_token_id,
+        stopping_criteria=StoppingCriteriaList([WholeWordsCriteria(tokenizer, prompt_len, num_words, after_space)])
+    )
+
+    # Rows come as num_samples consecutive sequences per prompt
+    texts = tokenizer.batch_decode(out[:, prompt_len:], skip_special_tokens=True)
+    results = []
+    for i in range(len(prompts)):
+        samples = []
+        for j in range(i * num_samples, (i + 1) * num_samples):
+            collector = WordCollector(after_space[j])
+            collector.feed(texts[j])
+            samples.append(" ".join(collector.finish()[:num_words]))
+        results.append(samples)
+    return results
 
 
 # Top 3 alternatives
 def generate_top3(model, tokenizer, text, num_words=2):
-    results = []
-    input_ids = tokenizer.encode(text, return_tensors="pt").to(device)
-    attention_mask = torch.ones_like(input_ids).to(device)
-
-    for _ in range(3):
-        out = model.generate(
-            input_ids,
-            max_new_tokens=20,
-            do_sample=True,
-            top_k=50,
-            top_p=0.95,
-            pad_token_id=tokenizer.eos_token_id,
-            attention_mask=attention_mask
-        )
-        new_text = tokenizer.decode(out[0], skip_special_tokens=True)
-        frag = new_text[len(text):].strip()
-        words = re.findall(r'(?<=\s)[A-Za-z\'-]+', " " + frag)
-        results.append(" ".join(words[:num_words]))
-
-    return results
+    return generate_batch(model, tokenizer, [text], num_words=num_words, num_samples=3)[0]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+import json
+import time
+import random
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PROMPTS = [
+    "The weather today is",
+    "I would like to",
+    "The best way to learn",
+    "She opened the door and",
+    "In the middle of the",
+    "My favourite food is",
+    "The meeting was moved to",
+    "He looked at the sky",
+]
+
+
+def post(url, payload, timeout):
+    data = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def get(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+# Number for the summary line; n/a when there was nothing to measure
+def fmt(value, spec, unit=""):
+    return "n/a" if value is None else format(value, spec) + unit
+
+
+# Fire `requests` predictions from `concurrency` client threads, returns throughput and client-side latency
+def run_level(base_url, concurrency, requests, num_words, timeout, rng):
+    prompts = [rng.choice(PROMPTS) for _ in range(requests)]
+    latencies = []
+    errors = 0
+
+    def one(prompt):
+        start = time.perf_counter()
+        post(base_url + "/predict", {"text": prompt, "num_words": num_words}, timeout)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(one, p) for p in prompts]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for server.py.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--num-words", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for level in args.concurrency:
+        r = run_level(args.url, level, args.requests, args.num_words, args.timeout, rng)
+        r["server"] = get(args.url + "/metrics", args.timeout)
+        results.append(r)
+        print(f"concurrency={level:>3}  {fmt(r['throughput_rps'], '.2f')} req/s  p50={fmt(r['p50_ms'], '.0f', 'ms')}  "
+              f"p99={fmt(r['p99_ms'], '.0f', 'ms')}  errors={r['errors']}  "
+              f"mean_batch={fmt(r['server']['mean_batch_size'], '.2f')}  max_queue={r['server']['max_queue_depth']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,46 @@
+import os
 import pandas as pd
 import numpy as np
 import torch
 from transformers import BertForQuestionAnswering
 from transformers import BertTokenizer
-from deep_translator import GoogleTranslator
 
-model = BertForQuestionAnswering.from_pretrained('bert-large-uncased-whole-word-masking-finetuned-squad')
-tokenizer = BertTokenizer.from_pretrained('bert-large-uncased-whole-word-masking-finetuned-squad')
+MODEL_NAME = 'bert-large-uncased-whole-word-masking-finetuned-squad'
+NO_ANSWER = "Unable to find the answer to your question."
 
-def question_answer(question, text):
+#intra-op and inter-op thread pools; the inter-op size can only be set before torch first uses it
+def set_cpu_threads(num_threads=None, interop_threads=None):
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
+
+#optimized mode: no autograd, int8 dynamic quantization of the Linear layers, tuned thread counts (CPU only)
+def load_bert_qa(optimized=False, num_threads=None, interop_threads=None):
+    model = BertForQuestionAnswering.from_pretrained(MODEL_NAME).eval()
+    tokenizer = BertTokenizer.from_pretrained(MODEL_NAME)
+    if optimized:
+        set_cpu_threads(num_threads, interop_threads)
+        model.requires_grad_(False)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, tokenizer
+
+#model is loaded on first use; QA_OPTIMIZED=1 selects the optimized CPU path
+_qa_model = None
+
+def get_qa_model():
+    global _qa_model
+    if _qa_model is None:
+        _qa_model = load_bert_qa(optimized=os.environ.get("QA_OPTIMIZED") == "1")
+    return _qa_model
+
+@torch.inference_mode()
+def question_answer(question, text, model=None, tokenizer=None):
+    if model is None:
+        model, tokenizer = get_qa_model()
 
     #tokenize question and text as a pair
     input_ids = tokenizer.encode(question, text)
@@ -36,7 +68,7 @@ def question_answer(question, text):
     answer_end = torch.argmax(output.end_logits)
 
     if answer_start == 0 and answer_end == 0:
-        answer = "Unable to find the answer to your question."
+        answer = NO_ANSWER
     else:
         answer = tokens[answer_start]
         for i in range(answer_start + 1, answer_end + 1):
@@ -46,10 +78,124 @@ def question_answer(question, text):
                 answer += " " + tokens[i]
     return answer
 
-text = """In computer science, the Cocke–Younger–Kasami algorithm (alternatively called CYK, or CKY) is a parsing algorithm for context-free grammars published by Itiroo Sakai in 1961.[1][2] The algorithm is named after some of its rediscoverers: John Cocke, Daniel Younger, Tadao Kasami, and Jacob T. Schwartz. It employs bottom-up parsing and dynamic programming."""
-question = "When was I born?"
-answer_en = question_answer(question, text)
-print("Original answer:n", answer_en)
-# Translate to Romanian
-answer_ro = GoogleTranslator(source='en', target='ro').translate(answer_en)
-print("Answer in Romanian:", answer_ro)
\ No newline at end of file
+#wordpieces back to text ("##" marks a continuation)
+def join_wordpieces(tokens):
+    answer = ""
+    for tok in tokens:
+        if tok[0:2] == "##":
+            answer += tok[2:]
+        else:
+            answer += (" " if answer else "") + tok
+    return answer
+
+#split context token ids into windows of at most max_ctx tokens, consecutive windows sharing `stride` tokens
+def split_windows(context_ids, max_ctx, stride=128):
+    if max_ctx <= 0:
+        raise ValueError("question is too long for max_length")
+    step = max(1, max_ctx - stride)
+    windows = []
+    start = 0
+    while True:
+        windows.append((start, context_ids[start:start + max_ctx]))
+        if start + max_ctx >= len(context_ids):
+            break
+        start += step
+    return windows
+
+#[CLS] question [SEP] window [SEP] rows padded into one batch, plus a mask of the window positions
+def encode_pairs(pairs, tokenizer):
+    rows = [[tokenizer.cls_token_id] + q + [tokenizer.sep_token_id] + w + [tokenizer.sep_token_id] for q, w in pairs]
+    max_len = max(len(row) for row in rows)
+    input_ids = torch.full((len(rows), max_len), tokenizer.pad_token_id, dtype=torch.long)
+    token_type_ids = torch.zeros((len(rows), max_len), dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), max_len), dtype=torch.long)
+    context_mask = torch.zeros((len(rows), max_len), dtype=torch.bool)
+    for r, (row, (q, w)) in enumerate(zip(rows, pairs)):
+        offset = len(q) + 2
+        input_ids[r, :len(row)] = torch.tensor(row)
+        attention_mask[r, :len(row)] = 1
+        token_type_ids[r, offset:len(row)] = 1
+        context_mask[r, offset:offset + len(w)] = True
+    return input_ids, token_type_ids, attention_mask, context_mask
+
+#best valid span per row: top-k starts x top-k ends inside the context, end >= start, at most max_answer_len tokens
+def best_spans(start_logits, end_logits, context_mask, top_k=20, max_answer_len=30):
+    k = min(top_k, start_logits.shape[1])
+    lowest = torch.finfo(start_logits.dtype).min
+    start_val, start_idx = start_logits.masked_fill(~context_mask, lowest).topk(k, dim=1)
+    end_val, end_idx = end_logits.masked_fill(~context_mask, lowest).topk(k, dim=1)
+
+    scores = start_val[:, :, None] + end_val[:, None, :]
+    length = end_idx[:, None, :] - start_idx[:, :, None]
+    valid = (length >= 0) & (length < max_answer_len)
+    valid &= context_mask.gather(1, start_idx)[:, :, None] & context_mask.gather(1, end_idx)[:, None, :]
+    scores = scores.masked_fill(~valid, float("-inf")).flatten(1)
+
+    best_score, best = scores.max(dim=1)
+    best_start = start_idx.gather(1, (best // k)[:, None]).squeeze(1)
+    best_end = end_idx.gather(1, (best % k)[:, None]).squeeze(1)
+    return best_score, best_start, best_end
+
+#many questions about one document: the context is tokenized once and split into overlapping windows
+#(stride = shared tokens) per question; every (question, window) pair runs in one padded batch
+#(or batches of batch_size rows). Returns (answer, score) per question, score = start + end logit.
+@torch.inference_mode()
+def answer_questions(questions, text, max_length=384, stride=128, top_k=20, max_answer_len=30,
+                     batch_size=None, model=None, tokenizer=None):
+    if batch_size is not None and batch_size < 1:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+    if not questions:
+        return []
+    if model is None:
+        model, tokenizer = get_qa_model()
+
+    context_ids = tokenizer.encode(text, add_special_tokens=False)
+    pairs = []
+    owners = []  #(question index, context position of the row's first window token, row context offset)
+    for qi, question in enumerate(questions):
+        question_ids = tokenizer.encode(question, add_special_tokens=False)
+        for window_start, window in split_windows(context_ids, max_length - len(question_ids) - 3, stride):
+            pairs.append((question_ids, window))
+            owners.append((qi, window_start, len(question_ids) + 2))
+
+    best = [(float("-inf"), 0, -1) for _ in questions]
+    null_scores = [float("inf") for _ in questions]
+    batch_size = batch_size or max(1, len(pairs))
+    for b in range(0, len(pairs), batch_size):
+        input_ids, token_type_ids, attention_mask, context_mask = encode_pairs(pairs[b:b + batch_size], tokenizer)
+        output = model(input_ids, token_type_ids=token_type_ids, attention_mask=attention_mask)
+        scores, starts, ends = best_spans(output.start_logits, output.end_logits, context_mask, top_k, max_answer_len)
+        nulls = (output.start_logits[:, 0] + output.end_logits[:, 0]).tolist()
+
+        for r, (score, start, end, null) in enumerate(zip(scores.tolist(), starts.tolist(), ends.tolist(), nulls)):
+            qi, window_start, offset = owners[b + r]
+            null_scores[qi] = min(null_scores[qi], null)
+            if score > best[qi][0]:
+                #row positions -> context token positions
+                best[qi] = (score, window_start + start - offset, window_start + end - offset)
+
+    results = []
+    for (score, start, end), null_score in zip(best, null_scores):
+        if end < start or null_score > score:
+            results.append((NO_ANSWER, score))
+        else:
+            results.append((join_wordpieces(tokenizer.convert_ids_to_tokens(context_ids[start:end + 1])), score))
+    return results
+
+#long documents: best valid span over all windows of one question, see answer_questions
+def question_answer_long(question, text, max_length=384, stride=128, top_k=20, max_answer_len=30,
+                         batch_size=None, model=None, tokenizer=None, return_score=False):
+    answer, score = answer_questions([question], text, max_length, stride, top_k, max_answer_len,
+                                     batch_size, model, tokenizer)[0]
+    return (answer, score) if return_score else answer
+
+if __name__ == "__main__":
+    from deep_translator import GoogleTranslator
+
+    text = """In computer science, the Cocke–Younger–Kasami algorithm (alternatively called CYK, or CKY) is a parsing algorithm for context-free grammars published by Itiroo Sakai in 1961.[1][2] The algorithm is named after some of its rediscoverers: John Cocke, Daniel Younger, Tadao Kasami, and Jacob T. Schwartz. It employs bottom-up parsing and dynamic programming."""
+    question = "When was I born?"
+    answer_en = question_answer(question, text)
+    print("Original answer:n", answer_en)
+    # Translate to Romanian
+    answer_ro = GoogleTranslator(source='en', target='ro').translate(answer_en)
+    print("Answer in Romanian:", answer_ro)
\ No newline at end of file
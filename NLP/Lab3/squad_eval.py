@@ -0,0 +1,164 @@
+import re
+import json
+import time
+import string
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+#pip install ijson (optional: streams the input file; without it the file is read with json.load)
+
+#SQuAD-format evaluation of answer_questions: EM/F1, questions/s and latency
+#v1.1 and v2.0 files: an unanswerable question (no gold answers) counts as correct when the model
+#finds no answer, as in the official v2.0 script
+#usage: python squad_eval.py dev-v1.1.json --workers 4 --limit 1000
+
+def _read_paragraphs(f):
+    try:
+        import ijson
+    except ImportError:
+        return (p for article in json.load(f)["data"] for p in article["paragraphs"])
+    return ijson.items(f, "data.item.paragraphs.item")
+
+#no gold answers (v2.0 unanswerable): the only correct prediction is ""
+def gold_answers(qa):
+    return [a["text"] for a in qa.get("answers", [])] or [""]
+
+#one (context, questions) group per paragraph, parsed incrementally when ijson is installed
+def iter_paragraphs(path, limit=None):
+    seen = 0
+    with open(path, "rb") as f:
+        for paragraph in _read_paragraphs(f):
+            if limit is not None and seen >= limit:
+                return
+            qas = paragraph["qas"]
+            if limit is not None:
+                qas = qas[:limit - seen]
+            if not qas:
+                continue
+            yield paragraph["context"], [(qa["id"], qa["question"], gold_answers(qa)) for qa in qas]
+            seen += len(qas)
+
+#official SQuAD normalization: lowercase, no punctuation, no articles, single spaces
+def normalize_answer(s):
+    s = s.lower()
+    s = "".join(ch for ch in s if ch not in set(string.punctuation))
+    s = re.sub(r"\b(a|an|the)\b", " ", s)
+    return " ".join(s.split())
+
+def exact_match(prediction, truth):
+    return float(normalize_answer(prediction) == normalize_answer(truth))
+
+def f1_score(prediction, truth):
+    pred_tokens = normalize_answer(prediction).split()
+    truth_tokens = normalize_answer(truth).split()
+    if not pred_tokens or not truth_tokens:
+        return float(pred_tokens == truth_tokens)
+    common = Counter(pred_tokens) & Counter(truth_tokens)
+    overlap = sum(common.values())
+    if overlap == 0:
+        return 0.0
+    precision = overlap / len(pred_tokens)
+    recall = overlap / len(truth_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+def best_over_truths(metric, prediction, truths):
+    if not truths:
+        return 0.0
+    return max(metric(prediction, t) for t in truths)
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+#one model per worker process
+_qa = {}
+
+def init_worker(optimized, threads, batch_size):
+    from Lab3 import load_bert_qa
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    _qa["model"], _qa["tokenizer"] = load_bert_qa(optimized=optimized)
+    _qa["batch_size"] = batch_size
+
+def answer_paragraph(group):
+    from Lab3 import answer_questions, NO_ANSWER
+    context, qas = group
+    start = time.perf_counter()
+    results = answer_questions([q for _, q, _ in qas], context, batch_size=_qa["batch_size"],
+                               model=_qa["model"], tokenizer=_qa["tokenizer"])
+    elapsed = time.perf_counter() - start
+    results = [("" if answer == NO_ANSWER else answer, score) for answer, score in results]
+    return [(qid, answer, score, truths) for (qid, _, truths), (answer, score) in zip(qas, results)], elapsed
+
+#pool.map in input order, with at most `window` paragraphs submitted and not yet consumed
+def bounded_map(pool, fn, items, window):
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the BERT QA batch API on a SQuAD-format file.")
+    parser.add_argument("squad_json")
+    parser.add_argument("--workers", type=int, default=0, help="process pool size (0 = in-process)")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per process")
+    parser.add_argument("--optimized", action="store_true", help="use the int8 CPU path of load_bert_qa")
+    parser.add_argument("--batch-size", type=int, default=None, help="max (question, window) rows per forward pass")
+    parser.add_argument("--limit", type=int, default=None, help="evaluate only the first N questions")
+    parser.add_argument("--predictions", help="write {id: answer} predictions to this file")
+    args = parser.parse_args()
+
+    groups = iter_paragraphs(args.squad_json, args.limit)
+    predictions = {}
+    em = f1 = 0.0
+    latencies_ms = []  #per paragraph batch
+    amortized_ms = []  #paragraph time / its questions (they share forward passes)
+
+    start = time.perf_counter()
+    if args.workers:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                   initargs=(args.optimized, args.threads, args.batch_size))
+        results = bounded_map(pool, answer_paragraph, groups, 2 * args.workers)
+    else:
+        pool = None
+        init_worker(args.optimized, args.threads, args.batch_size)
+        results = map(answer_paragraph, groups)
+
+    try:
+        for answers, elapsed in results:
+            latencies_ms.append(elapsed * 1000)
+            amortized_ms.extend([elapsed * 1000 / len(answers)] * len(answers))
+            for qid, answer, _, truths in answers:
+                predictions[qid] = answer
+                em += best_over_truths(exact_match, answer, truths)
+                f1 += best_over_truths(f1_score, answer, truths)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    wall = time.perf_counter() - start
+
+    n = len(predictions)
+    report = {
+        "questions": n,
+        "exact_match": 100 * em / n if n else None,
+        "f1": 100 * f1 / n if n else None,
+        "questions_per_s": n / wall if wall else None,
+        "paragraph_latency_ms": {"p50": percentile(latencies_ms, 50), "p99": percentile(latencies_ms, 99)},
+        "amortized_question_latency_ms": {"p50": percentile(amortized_ms, 50), "p99": percentile(amortized_ms, 99)},
+        "wall_s": wall,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.predictions:
+        with open(args.predictions, "w", encoding="utf-8") as f:
+            json.dump(predictions, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import json
+import time
+import argparse
+from itertools import islice
+
+from nltk.grammar import PCFG
+from nltk.parse import ChartParser, ViterbiParser
+
+from cky import ViterbiCKYParser
+
+# ViterbiCKYParser vs NLTK's ChartParser (all parses) and ViterbiParser (best parse)
+# on PP-attachment sentences whose number of parses grows with the Catalan numbers.
+# usage: python bench_cky.py --pps 1 2 3 4 5 6 8 10 --k 5
+
+GRAMMAR = PCFG.fromstring("""
+S -> NP VP [1.0]
+NP -> Det N [0.5]
+NP -> NP PP [0.3]
+NP -> 'i' [0.2]
+VP -> V NP [0.6]
+VP -> VP PP [0.4]
+PP -> P NP [1.0]
+Det -> 'the' [0.6]
+Det -> 'a' [0.4]
+N -> 'man' [0.3]
+N -> 'telescope' [0.2]
+N -> 'park' [0.2]
+N -> 'hill' [0.15]
+N -> 'dog' [0.15]
+V -> 'saw' [1.0]
+P -> 'with' [0.4]
+P -> 'in' [0.3]
+P -> 'on' [0.3]
+""")
+
+PPS = [["with", "a", "telescope"], ["in", "the", "park"], ["on", "the", "hill"], ["with", "the", "dog"]]
+
+
+def sentence(num_pps):
+    tokens = ["i", "saw", "the", "man"]
+    for i in range(num_pps):
+        tokens += PPS[i % len(PPS)]
+    return tokens
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CKY parser against NLTK's ChartParser.")
+    parser.add_argument("--pps", type=int, nargs="+", default=[1, 2, 3, 4, 5, 6, 8, 10])
+    parser.add_argument("--k", type=int, default=5, help="number of parses for the top-k run")
+    parser.add_argument("--max-parses", type=int, default=20000, help="stop enumerating ChartParser parses here")
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    chart = ChartParser(GRAMMAR)
+    viterbi = ViterbiParser(GRAMMAR)
+    cky = ViterbiCKYParser(GRAMMAR)
+
+    results = []
+    for num_pps in args.pps:
+        tokens = sentence(num_pps)
+        try:
+            parses, chart_ms = timed(lambda: sum(1 for _ in islice(chart.parse(tokens), args.max_parses)))
+        except ValueError:
+            # NLTK refuses to extract trees once the parse forest gets too large
+            parses, chart_ms = None, None
+        best, viterbi_ms = timed(lambda: next(viterbi.parse(tokens)))
+        ours, cky_ms = timed(lambda: cky.best_parse(tokens))
+        top, topk_ms = timed(lambda: cky.parse(tokens, k=args.k))
+
+        r = {
+            "words": len(tokens),
+            "parses": parses if parses is not None and parses < args.max_parses else f">={args.max_parses}",
+            "chart_all_ms": chart_ms,
+            "nltk_viterbi_ms": viterbi_ms,
+            "cky_best_ms": cky_ms,
+            "cky_top_k_ms": topk_ms,
+            "same_best_logprob": abs(best.logprob() - ours.logprob()) < 1e-9,
+            "top_k_logprobs": [t.logprob() for t in top],
+        }
+        results.append(r)
+        chart_str = f"{chart_ms:9.1f}ms" if chart_ms is not None else "  refused"
+        print(f"words={r['words']:>3}  parses={r['parses']!s:>8}  chart={chart_str}  "
+              f"nltk_viterbi={viterbi_ms:8.1f}ms  cky={cky_ms:7.1f}ms  cky_top{args.k}={topk_ms:7.1f}ms  "
+              f"agree={r['same_best_logprob']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import gc
+import json
+import time
+import random
+import argparse
+from math import sqrt
+from collections import defaultdict
+
+from nltk.grammar import PCFG, Nonterminal, ProbabilisticProduction
+
+from cnf import cnf_from_pcfg
+
+# cnf_from_pcfg vs the previous list-rebuilding pcfg_to_cnf on synthetic treebank-style grammars
+# usage: python bench_cnf.py --rules 10000 30000 100000
+
+
+# The pcfg_to_cnf that lab4.py used before cnf.py (binarization with sqrt-split probabilities
+# and per-LHS intermediate names, terminal lifting, unit productions left in place)
+def legacy_pcfg_to_cnf(pcfg):
+    cnf_productions = []
+
+    def binarize(prod):
+        lhs, rhs, prob = prod.lhs(), prod.rhs(), prod.prob()
+        if len(rhs) <= 2:
+            return [prod]
+        new_prods = []
+        current_lhs = lhs
+        step_prob = sqrt(prob)
+
+        for i in range(len(rhs) - 2):
+            new_nt = Nonterminal(f"{lhs}_{i}")
+            new_prods.append(ProbabilisticProduction(current_lhs, [rhs[i], new_nt], prob=step_prob))
+            current_lhs = new_nt
+        new_prods.append(ProbabilisticProduction(current_lhs, list(rhs[-2:]), prob=step_prob))
+        return new_prods
+
+    for prod in pcfg.productions():
+        cnf_productions.extend(binarize(prod))
+
+    new_prods, terminal_map, next_id = [], {}, 0
+    for prod in cnf_productions:
+        lhs, rhs, prob = prod.lhs(), prod.rhs(), prod.prob()
+        if len(rhs) == 2:
+            new_rhs = []
+            for sym in rhs:
+                if isinstance(sym, str):
+                    if sym not in terminal_map:
+                        terminal_map[sym] = Nonterminal(f"T_{next_id}")
+                        next_id += 1
+                        new_prods.append(ProbabilisticProduction(terminal_map[sym], [sym], prob=1.0))
+                    new_rhs.append(terminal_map[sym])
+                else:
+                    new_rhs.append(sym)
+            new_prods.append(ProbabilisticProduction(lhs, new_rhs, prob=prob))
+        else:
+            new_prods.append(prod)
+
+    return PCFG(pcfg.start(), new_prods)
+
+
+# A grammar shaped like one induced from a treebank: a few hundred phrase labels, flat
+# right-hand sides of length 2-8, some unit productions and some inline terminals;
+# every label has at least one rule, as in any grammar read off trees
+def synthetic_grammar(num_rules, num_labels, vocab_size, seed):
+    rng = random.Random(seed)
+    labels = [Nonterminal("S")] + [Nonterminal(f"X{i}") for i in range(1, num_labels)]
+    tags = [Nonterminal(f"TAG{i}") for i in range(max(2, num_labels // 4))]
+    words = [f"w{i}" for i in range(vocab_size)]
+    counts = defaultdict(int)
+
+    for tag in tags:
+        for word in rng.sample(words, min(len(words), 20)):
+            counts[tag, (word,)] += rng.randint(1, 50)
+    for lhs in labels:
+        counts[lhs, (rng.choice(tags), rng.choice(tags))] += 1
+    while len(counts) < num_rules:
+        i = rng.randrange(len(labels))
+        lhs = labels[i]
+        if rng.random() < 0.05:
+            # Unit productions mostly go from phrases to tags (NP -> NN), otherwise down the label list
+            below = labels[i + 1:]
+            rhs = (rng.choice(below) if below and rng.random() < 0.1 else rng.choice(tags),)
+        else:
+            length = min(8, 2 + int(rng.expovariate(0.6)))
+            rhs = tuple(rng.choice(words) if rng.random() < 0.05 else rng.choice(labels[1:] + tags)
+                        for _ in range(length))
+        counts[lhs, rhs] += rng.randint(1, 20)
+
+    totals = defaultdict(int)
+    for (lhs, _), count in counts.items():
+        totals[lhs] += count
+    prods = [ProbabilisticProduction(lhs, list(rhs), prob=count / totals[lhs]) for (lhs, rhs), count in counts.items()]
+    return PCFG(labels[0], prods)
+
+
+def timed(fn):
+    gc.collect()
+    start = time.perf_counter()
+    try:
+        result, error = fn(), None
+    except ValueError as e:
+        result, error = None, str(e).splitlines()[0][:120]
+    return result, (time.perf_counter() - start) * 1000, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CNF conversion on large induced grammars.")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10000, 30000, 100000])
+    parser.add_argument("--labels", type=int, default=400)
+    parser.add_argument("--vocab", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    # Both of these end in nltk's PCFG constructor, whose left-corner closure dominates the time
+    # and needs several GB of memory past a few 10^4 rules
+    parser.add_argument("--legacy-max-rules", type=int, default=20000, help="run the old converter up to this size")
+    parser.add_argument("--to-pcfg", action="store_true", help="also time CNFGrammar.to_pcfg()")
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for num_rules in args.rules:
+        pcfg = synthetic_grammar(num_rules, args.labels, args.vocab, args.seed)
+        tables, convert_ms, _ = timed(lambda: cnf_from_pcfg(pcfg))
+        r = {
+            "input_rules": len(pcfg.productions()),
+            "unit_rules": sum(1 for p in pcfg.productions() if len(p.rhs()) == 1 and p.is_nonlexical()),
+            "cnf_rules": len(tables),
+            "cnf_nonterminals": len(tables.nonterminals),
+            "cnf_from_pcfg_ms": convert_ms,
+        }
+        if args.to_pcfg:
+            _, r["to_pcfg_ms"], _ = timed(lambda: tables.to_pcfg())
+        if num_rules <= args.legacy_max_rules:
+            legacy, legacy_ms, error = timed(lambda: legacy_pcfg_to_cnf(pcfg))
+            r["legacy_ms"] = legacy_ms
+            r["legacy_rules"] = len(legacy.productions()) if legacy is not None else None
+            r["legacy_error"] = error
+        results.append(r)
+
+        line = (f"rules={r['input_rules']:>7} (unit {r['unit_rules']:>5})  cnf_rules={r['cnf_rules']:>7}  "
+                f"cnf_from_pcfg={convert_ms:8.0f}ms")
+        if "to_pcfg_ms" in r:
+            line += f"  to_pcfg={r['to_pcfg_ms']:8.0f}ms"
+        if "legacy_ms" in r:
+            line += f"  legacy={r['legacy_ms']:8.0f}ms" + (f" (failed: {r['legacy_error']})" if r["legacy_error"] else "")
+        print(line)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
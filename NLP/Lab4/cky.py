@@ -0,0 +1,248 @@
+import numpy as np
+from nltk.grammar import Nonterminal
+from nltk.tree import Tree, ProbabilisticTree
+
+from cnf import CNFGrammar
+
+# Probabilistic CKY parser over a CNF grammar (the output of cnf_from_pcfg).
+#
+# Rules are indexed once: lexical rules by terminal, binary rules by their left child (CSR
+# layout, so all rules whose left child is present in a cell are gathered with one slice each),
+# unit productions A -> B through a max-product closure (best chain for every pair A, B).
+#
+# Every chart cell keeps the k best log-probabilities per nonterminal in NumPy arrays, in two
+# layers: "pre" (derivations ending in a lexical or binary rule) and "post" (pre plus the best
+# unit chain on top). Binary rules combine post entries of the two sub-spans, and all
+# backpointers point into layers that are final once written, so the k best trees can be
+# rebuilt exactly. Alternative unit chains between the same pair of symbols are not enumerated,
+# so k > 1 is refused for grammars with unit productions (convert them with cnf_from_pcfg first).
+
+NEG_INF = -np.inf
+
+
+class ViterbiCKYParser:
+    # grammar: a CNFGrammar from cnf.py (used as is) or an NLTK PCFG in CNF, unit productions allowed
+    def __init__(self, grammar):
+        self.grammar = grammar
+        if isinstance(grammar, CNFGrammar):
+            binary, unary = self._load_tables(grammar)
+        else:
+            binary, unary = self._load_pcfg(grammar)
+
+        # Binary rules sorted by (left, right) child, with CSR offsets by left child
+        order = np.lexsort((binary[2], binary[1]))
+        self.bin_lhs, self.bin_left, self.bin_right, self.bin_logp = (col[order] for col in binary)
+        self.left_offsets = np.searchsorted(self.bin_left, np.arange(len(self.nonterminals) + 1))
+
+        self.has_unary = len(unary) > 0
+        self._build_unary_closure(unary)
+
+    def _load_tables(self, grammar):
+        self.nonterminals = grammar.nonterminals
+        self.index = {nt: i for i, nt in enumerate(self.nonterminals)}
+        self.start = self.nonterminals[grammar.start]
+
+        # Lexical rules by terminal: (lhs ids, log-probs)
+        order = np.argsort(grammar.lex_term, kind="stable")
+        terms = grammar.lex_term[order]
+        bounds = np.flatnonzero(np.r_[True, terms[1:] != terms[:-1], True])
+        self.lexical = {grammar.terminals[terms[lo]]: (grammar.lex_lhs[order[lo:hi]], grammar.lex_logp[order[lo:hi]])
+                        for lo, hi in zip(bounds[:-1], bounds[1:])}
+        return (grammar.bin_lhs, grammar.bin_left, grammar.bin_right, grammar.bin_logp), []
+
+    def _load_pcfg(self, grammar):
+        self.start = grammar.start()
+        symbols = {grammar.start()}
+        for prod in grammar.productions():
+            symbols.add(prod.lhs())
+            symbols.update(s for s in prod.rhs() if isinstance(s, Nonterminal))
+        self.nonterminals = sorted(symbols, key=lambda s: s.symbol())
+        self.index = {nt: i for i, nt in enumerate(self.nonterminals)}
+
+        lexical = {}
+        binary = []
+        unary = []
+        for prod in grammar.productions():
+            lhs, rhs, logp = self.index[prod.lhs()], prod.rhs(), np.log(prod.prob())
+            if len(rhs) == 1 and not isinstance(rhs[0], Nonterminal):
+                lexical.setdefault(rhs[0], []).append((lhs, logp))
+            elif len(rhs) == 1:
+                unary.append((lhs, self.index[rhs[0]], logp))
+            elif len(rhs) == 2 and all(isinstance(s, Nonterminal) for s in rhs):
+                binary.append((lhs, self.index[rhs[0]], self.index[rhs[1]], logp))
+            else:
+                raise ValueError(f"not a CNF production: {prod}")
+
+        self.lexical = {w: (np.array([a for a, _ in rules], dtype=np.int64), np.array([p for _, p in rules]))
+                        for w, rules in lexical.items()}
+        columns = (np.array([r[i] for r in binary], dtype=np.int64) for i in range(3))
+        return (*columns, np.array([r[3] for r in binary], dtype=np.float64)), unary
+
+    # Best unit chain A =>* B for the symbols taking part in unit productions (Floyd-Warshall, max-product)
+    def _build_unary_closure(self, unary):
+        members = sorted({a for a, _, _ in unary} | {b for _, b, _ in unary})
+        self.unary_members = np.array(members, dtype=np.int64)
+        m = len(members)
+        pos = {nt: i for i, nt in enumerate(members)}
+
+        best = np.full((m, m), NEG_INF)
+        nxt = np.tile(np.arange(m), (m, 1))  # next symbol on the best chain from row to column
+        for a, b, logp in unary:
+            if logp > best[pos[a], pos[b]]:
+                best[pos[a], pos[b]] = logp
+        np.fill_diagonal(best, 0.0)  # the empty chain
+
+        for k in range(m):
+            via = best[:, k, None] + best[None, k, :]
+            better = via > best
+            best = np.where(better, via, best)
+            nxt = np.where(better, nxt[:, k, None], nxt)
+
+        self.unary_best = best
+        self.unary_next = nxt
+        self.unary_pos = pos
+
+    # Top-k entries per group id; returns positions into the inputs and their ranks
+    @staticmethod
+    def _top_k_per_group(groups, scores, k):
+        order = np.lexsort((-scores, groups))
+        g = groups[order]
+        starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        sizes = np.diff(np.r_[starts, len(g)])
+        ranks = np.arange(len(g)) - np.repeat(starts, sizes)
+        keep = ranks < k
+        return order[keep], ranks[keep]
+
+    def _chart(self, n, k):
+        shape = (n, n + 1, len(self.nonterminals), k)
+        self.pre = np.full(shape, NEG_INF)
+        self.pre_rule = np.full(shape, -1, dtype=np.int64)  # binary rule id, -1 for lexical
+        self.pre_split = np.zeros(shape, dtype=np.int32)
+        self.pre_r1 = np.zeros(shape, dtype=np.int32)
+        self.pre_r2 = np.zeros(shape, dtype=np.int32)
+        self.post = np.full(shape, NEG_INF)
+        self.post_src = np.zeros(shape, dtype=np.int64)  # symbol the unit chain ends in
+        self.post_rank = np.zeros(shape, dtype=np.int32)  # rank in that symbol's pre list
+
+    # Ids of all binary rules whose left child is one of `lefts` (concatenated CSR slices)
+    def _rules_by_left(self, lefts):
+        starts = self.left_offsets[lefts]
+        sizes = self.left_offsets[lefts + 1] - starts
+        total = sizes.sum()
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        shift = np.repeat(starts - np.r_[0, np.cumsum(sizes)[:-1]], sizes)
+        return shift + np.arange(total)
+
+    def _fill_binary(self, i, j, k):
+        # All splits at once: left[s] = post[i, i+1+s], right[s] = post[i+1+s, j]
+        left = self.post[i, i + 1:j]
+        right = self.post[i + 1:j, j]
+        left_ok = left[:, :, 0] > NEG_INF
+        right_ok = right[:, :, 0] > NEG_INF
+        rules = self._rules_by_left(np.flatnonzero(left_ok.any(axis=0)))
+        if not len(rules):
+            return
+        splits, rows = np.nonzero(left_ok[:, self.bin_left[rules]] & right_ok[:, self.bin_right[rules]])
+        if not len(rows):
+            return
+        rules = rules[rows]
+
+        cand = (left[splits, self.bin_left[rules]][:, :, None] + right[splits, self.bin_right[rules]][:, None, :]
+                + self.bin_logp[rules][:, None, None]).reshape(len(rules), k * k)
+        rows, flat = np.nonzero(cand > NEG_INF)
+        lhs = self.bin_lhs[rules[rows]]
+        scores = cand[rows, flat]
+        keep, ranks = self._top_k_per_group(lhs, scores, k)
+        rows, flat, a = rows[keep], flat[keep], lhs[keep]
+        self.pre[i, j, a, ranks] = scores[keep]
+        self.pre_rule[i, j, a, ranks] = rules[rows]
+        self.pre_split[i, j, a, ranks] = i + 1 + splits[rows]
+        self.pre_r1[i, j, a, ranks] = flat // k
+        self.pre_r2[i, j, a, ranks] = flat % k
+
+    def _fill_unary(self, i, j, k):
+        pre = self.pre[i, j]
+        self.post[i, j] = pre
+        self.post_src[i, j] = np.arange(len(self.nonterminals))[:, None]
+        self.post_rank[i, j] = np.arange(k)[None, :]
+        members = self.unary_members
+        if not len(members):
+            return
+
+        active = np.flatnonzero(pre[members, 0] > NEG_INF)
+        if not len(active):
+            return
+        # cand[a, b, r] = best chain members[a] =>* members[b], then pre entry r of members[b]
+        cand = self.unary_best[:, active][:, :, None] + pre[members[active]][None, :, :]
+        cand = cand.reshape(len(members), -1)
+        rows, flat = np.nonzero(cand > NEG_INF)
+        scores = cand[rows, flat]
+        keep, ranks = self._top_k_per_group(rows, scores, k)
+
+        a = members[rows[keep]]
+        self.post[i, j, a, ranks] = scores[keep]
+        self.post_src[i, j, a, ranks] = members[active[flat[keep] // k]]
+        self.post_rank[i, j, a, ranks] = flat[keep] % k
+
+    def _pre_tree(self, tokens, i, j, a, r):
+        label = self.nonterminals[a].symbol()
+        rule = self.pre_rule[i, j, a, r]
+        if rule < 0:
+            return Tree(label, [tokens[i]])
+        s = self.pre_split[i, j, a, r]
+        return Tree(label, [
+            self._post_tree(tokens, i, s, self.bin_left[rule], self.pre_r1[i, j, a, r]),
+            self._post_tree(tokens, s, j, self.bin_right[rule], self.pre_r2[i, j, a, r]),
+        ])
+
+    def _post_tree(self, tokens, i, j, a, r):
+        src = self.post_src[i, j, a, r]
+        subtree = self._pre_tree(tokens, i, j, src, self.post_rank[i, j, a, r])
+        if src == a:
+            return subtree
+        # Expand the unit chain a => ... => src top-down
+        chain = [a]
+        pa, ps = self.unary_pos[a], self.unary_pos[src]
+        while pa != ps:
+            pa = self.unary_next[pa, ps]
+            chain.append(self.unary_members[pa])
+        for sym in reversed(chain[:-1]):
+            subtree = Tree(self.nonterminals[sym].symbol(), [subtree])
+        return subtree
+
+    # The k most probable parses, best first, as ProbabilisticTrees; [] if the sentence has no parse
+    def parse(self, tokens, k=1):
+        if k > 1 and self.has_unary:
+            raise ValueError("k-best parsing needs a grammar without unit productions; "
+                             "convert it with cnf_from_pcfg")
+        tokens = list(tokens)
+        n = len(tokens)
+        if n == 0 or any(w not in self.lexical for w in tokens):
+            return []
+        self._chart(n, k)
+
+        for i, w in enumerate(tokens):
+            lhs, logp = self.lexical[w]
+            self.pre[i, i + 1, lhs, 0] = logp
+            self._fill_unary(i, i + 1, k)
+
+        for length in range(2, n + 1):
+            for i in range(0, n - length + 1):
+                j = i + length
+                self._fill_binary(i, j, k)
+                self._fill_unary(i, j, k)
+
+        start = self.index[self.start]
+        trees = []
+        for r in range(k):
+            logp = self.post[0, n, start, r]
+            if logp == NEG_INF:
+                break
+            tree = self._post_tree(tokens, 0, n, start, r)
+            trees.append(ProbabilisticTree(tree.label(), list(tree), logprob=float(logp / np.log(2))))
+        return trees
+
+    def best_parse(self, tokens):
+        trees = self.parse(tokens, k=1)
+        return trees[0] if trees else None
@@ -0,0 +1,210 @@
+from collections import defaultdict
+
+import numpy as np
+from nltk.grammar import PCFG, Nonterminal, ProbabilisticProduction
+
+# PCFG -> Chomsky Normal Form, keeping the probability of every sentence unchanged:
+#   1. terminals inside longer right-hand sides are lifted to T_<word> -> <word> [1.0]
+#   2. right-hand sides longer than 2 are binarized right to left; a suffix such as <B-C-D>
+#      gets one nonterminal shared by every production ending in it, with probability 1.0
+#      on its rule, so the original rule keeps its whole probability on the first step
+#   3. unit productions A -> B are removed: with U[A, B] the unit-rule probabilities,
+#      (I - U)^-1 sums every unit chain A =>* B, and A inherits B's other rules scaled by it
+#   4. symbols no longer reachable from the start symbol are dropped
+# Symbols are interned to integers up front, so the whole conversion works on int tuples
+# and ends in the integer rule tables of CNFGrammar. Trees of the result have no unit
+# nodes (a unit chain is folded into the rule that ends it).
+
+MIN_CLOSURE_PROB = 1e-12
+
+
+class CNFGrammar:
+    # lexical: (lhs, terminal, prob) triples, binary: (lhs, left, right, prob), all ids
+    def __init__(self, start, nonterminals, terminals, lexical, binary):
+        self.start = start
+        self.nonterminals = nonterminals
+        self.terminals = terminals
+
+        self.lex_lhs = np.array([r[0] for r in lexical], dtype=np.int64)
+        self.lex_term = np.array([r[1] for r in lexical], dtype=np.int64)
+        self.lex_logp = np.log(np.array([r[2] for r in lexical], dtype=np.float64))
+
+        binary = sorted(binary, key=lambda r: (r[1], r[2], r[0]))
+        self.bin_lhs = np.array([r[0] for r in binary], dtype=np.int64)
+        self.bin_left = np.array([r[1] for r in binary], dtype=np.int64)
+        self.bin_right = np.array([r[2] for r in binary], dtype=np.int64)
+        self.bin_logp = np.log(np.array([r[3] for r in binary], dtype=np.float64))
+
+    def __len__(self):
+        return len(self.lex_lhs) + len(self.bin_lhs)
+
+    def productions(self):
+        nts, terms = self.nonterminals, self.terminals
+        prods = [ProbabilisticProduction(nts[a], [terms[t]], logprob=lp / np.log(2))
+                 for a, t, lp in zip(self.lex_lhs.tolist(), self.lex_term.tolist(), self.lex_logp.tolist())]
+        prods += [ProbabilisticProduction(nts[a], [nts[b], nts[c]], logprob=lp / np.log(2))
+                  for a, b, c, lp in zip(self.bin_lhs.tolist(), self.bin_left.tolist(),
+                                         self.bin_right.tolist(), self.bin_logp.tolist())]
+        return prods
+
+    def to_pcfg(self):
+        return PCFG(self.nonterminals[self.start], self.productions())
+
+
+def cnf_from_pcfg(pcfg):
+    nonterminals, nt_index = [], {}
+    terminals, term_index = [], {}
+    used_names = set()
+
+    def nt_id(sym):
+        if sym not in nt_index:
+            nt_index[sym] = len(nonterminals)
+            nonterminals.append(sym)
+            used_names.add(sym.symbol())
+        return nt_index[sym]
+
+    # Terminals are encoded as negative codes so a right-hand side is a plain int tuple
+    def term_code(word):
+        if word not in term_index:
+            term_index[word] = len(terminals)
+            terminals.append(word)
+        return -term_index[word] - 1
+
+    start = nt_id(pcfg.start())
+    rules = []
+    for prod in pcfg.productions():
+        if not prod.rhs():
+            raise ValueError(f"empty productions are not supported: {prod}")
+        rhs = tuple(nt_id(s) if isinstance(s, Nonterminal) else term_code(s) for s in prod.rhs())
+        rules.append((nt_id(prod.lhs()), rhs, prod.prob()))
+
+    def fresh(name):
+        while name in used_names:
+            name += "'"
+        return nt_id(Nonterminal(name))
+
+    def name(code):
+        return nonterminals[code].symbol() if code >= 0 else terminals[-code - 1]
+
+    rules = _lift_terminals(rules, fresh, name)
+    rules = _binarize(rules, fresh, name)
+    rules = _eliminate_units(rules)
+    return _build_tables(rules, start, nonterminals, terminals)
+
+
+def _lift_terminals(rules, fresh, name):
+    lifted = {}
+    out = []
+    for lhs, rhs, prob in rules:
+        if len(rhs) > 1 and min(rhs) < 0:
+            new_rhs = []
+            for code in rhs:
+                if code < 0:
+                    if code not in lifted:
+                        lifted[code] = fresh(f"T_{name(code)}")
+                        out.append((lifted[code], (code,), 1.0))
+                    code = lifted[code]
+                new_rhs.append(code)
+            rhs = tuple(new_rhs)
+        out.append((lhs, rhs, prob))
+    return out
+
+
+def _binarize(rules, fresh, name):
+    suffixes = {}
+    out = []
+
+    def suffix_id(suffix):
+        # Build the chain from the shortest suffix up; each link is created once
+        for n in range(2, len(suffix) + 1):
+            part = suffix[-n:]
+            if part in suffixes:
+                continue
+            nt = fresh("<" + "-".join(name(c) for c in part) + ">")
+            suffixes[part] = nt
+            out.append((nt, part if n == 2 else (part[0], suffixes[part[1:]]), 1.0))
+        return suffixes[suffix]
+
+    for lhs, rhs, prob in rules:
+        if len(rhs) > 2:
+            rhs = (rhs[0], suffix_id(rhs[1:]))
+        out.append((lhs, rhs, prob))
+    return out
+
+
+def _eliminate_units(rules):
+    units = [(lhs, rhs[0], prob) for lhs, rhs, prob in rules if len(rhs) == 1 and rhs[0] >= 0]
+    if not units:
+        return rules
+
+    members = sorted({a for a, _, _ in units} | {b for _, b, _ in units})
+    pos = {nt: i for i, nt in enumerate(members)}
+    m = len(members)
+    unit_matrix = np.zeros((m, m))
+    for a, b, prob in units:
+        unit_matrix[pos[a], pos[b]] += prob
+    try:
+        closure = np.linalg.solve(np.eye(m) - unit_matrix, np.eye(m))
+    except np.linalg.LinAlgError:
+        raise ValueError("unit productions form a cycle with probability 1") from None
+
+    by_lhs = defaultdict(list)
+    out = []
+    for lhs, rhs, prob in rules:
+        if len(rhs) == 1 and rhs[0] >= 0:
+            continue
+        if lhs in pos:
+            by_lhs[lhs].append((rhs, prob))
+        else:
+            out.append((lhs, rhs, prob))
+
+    merged = defaultdict(float)
+    for b, b_rules in by_lhs.items():
+        column = closure[:, pos[b]]
+        for i in np.flatnonzero(column > MIN_CLOSURE_PROB).tolist():
+            a, weight = members[i], column[i]
+            for rhs, prob in b_rules:
+                merged[a, rhs] += weight * prob
+    out.extend((a, rhs, prob) for (a, rhs), prob in merged.items())
+    return out
+
+
+def _build_tables(rules, start, nonterminals, terminals):
+    by_lhs = defaultdict(list)
+    for rule in rules:
+        by_lhs[rule[0]].append(rule)
+
+    # Keep what is reachable from the start symbol, numbered in order of first definition
+    reachable = {start}
+    stack = [start]
+    while stack:
+        for _, rhs, _ in by_lhs[stack.pop()]:
+            for code in rhs:
+                if code >= 0 and code not in reachable:
+                    reachable.add(code)
+                    stack.append(code)
+    nt_map = {}
+    for nt in [start] + [lhs for lhs, _, _ in rules] + sorted(reachable):
+        if nt in reachable and nt not in nt_map:
+            nt_map[nt] = len(nt_map)
+    term_map = {}
+
+    lexical, binary = [], []
+    for lhs, rhs, prob in rules:
+        if lhs not in nt_map:
+            continue
+        if len(rhs) == 1:
+            t = -rhs[0] - 1
+            if t not in term_map:
+                term_map[t] = len(term_map)
+            lexical.append((nt_map[lhs], term_map[t], prob))
+        else:
+            binary.append((nt_map[lhs], nt_map[rhs[0]], nt_map[rhs[1]], prob))
+
+    new_nonterminals = [None] * len(nt_map)
+    for old, new in nt_map.items():
+        new_nonterminals[new] = nonterminals[old]
+    new_terminals = [None] * len(term_map)
+    for old, new in term_map.items():
+        new_terminals[new] = terminals[old]
+    return CNFGrammar(0, new_nonterminals, new_terminals, lexical, binary)
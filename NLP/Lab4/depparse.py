@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import spacy
+
+# Bulk dependency parsing: sentences (one per line) are streamed through nlp.pipe with only the
+# components the parse needs, and (token, head, dep) triples are written as columnar .npz shards:
+#   sent_offsets  int64  token range of every sentence (n_sentences + 1)
+#   line_numbers  int64  input line (1-based) of every sentence; blank lines are skipped
+#   heads         int32  head of every token, as an index within its sentence (the root points to itself)
+#   deps          uint16 code of every token's dependency label, into dep_labels
+#   text_offsets  int64  byte range of every token's text in text_blob (n_tokens + 1)
+#   text_blob     uint8  UTF-8 token texts, concatenated
+#   dep_labels    str    the labels the codes refer to
+# usage: python depparse.py sentences.txt parsed/ --batch-size 2000 --n-process 4
+
+# Only tok2vec and parser are needed for heads and labels
+UNUSED_COMPONENTS = ["tagger", "attribute_ruler", "lemmatizer", "ner", "senter"]
+
+
+# Load a spaCy model (package name or model directory), downloading it only when it is not installed
+def ensure_model(name="en_core_web_sm", exclude=UNUSED_COMPONENTS):
+    if not spacy.util.is_package(name) and not os.path.isdir(name):
+        from spacy.cli import download
+        download(name)
+    return spacy.load(name, exclude=exclude)
+
+
+# (sentence, line number) for every non-blank line
+def iter_sentences(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                yield line, line_number
+
+
+# Accumulates parsed docs column by column until a shard is written
+class ShardWriter:
+    def __init__(self, output_dir, shard_size=100000, compress=False):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.compress = compress
+        self.shards = 0
+        self.sentences = 0
+        self.tokens = 0
+        os.makedirs(output_dir, exist_ok=True)
+        self._reset()
+
+    def _reset(self):
+        self.sent_lengths = []
+        self.line_numbers = []
+        self.heads = []
+        self.deps = []
+        self.texts = []
+        self.labels = {}
+
+    def add(self, doc, line_number):
+        start = doc[0].i if len(doc) else 0
+        for token in doc:
+            self.texts.append(token.text)
+            self.heads.append(token.head.i - start)
+            self.deps.append(self.labels.setdefault(token.dep_, len(self.labels)))
+        self.sent_lengths.append(len(doc))
+        self.line_numbers.append(line_number)
+        if len(self.sent_lengths) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if not self.sent_lengths:
+            return None
+        encoded = [t.encode("utf-8") for t in self.texts]
+        path = os.path.join(self.output_dir, f"shard-{self.shards:05d}.npz")
+        save = np.savez_compressed if self.compress else np.savez
+        save(
+            path,
+            sent_offsets=np.concatenate([[0], np.cumsum(self.sent_lengths, dtype=np.int64)]),
+            line_numbers=np.array(self.line_numbers, dtype=np.int64),
+            heads=np.array(self.heads, dtype=np.int32),
+            deps=np.array(self.deps, dtype=np.uint16),
+            text_offsets=np.concatenate([[0], np.cumsum([len(b) for b in encoded], dtype=np.int64)]),
+            text_blob=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            dep_labels=np.array(list(self.labels), dtype=str),
+        )
+        self.shards += 1
+        self.sentences += len(self.sent_lengths)
+        self.tokens += len(self.texts)
+        self._reset()
+        return path
+
+
+# Sentences of one shard as lists of (token, head token, dep) triples,
+# or as (input line number, triples) with with_lines=True
+def iter_triples(path, with_lines=False):
+    shard = np.load(path)
+    sent_offsets, heads, deps = shard["sent_offsets"], shard["heads"], shard["deps"]
+    line_numbers = shard["line_numbers"]
+    text_offsets, blob, labels = shard["text_offsets"], shard["text_blob"].tobytes(), shard["dep_labels"].tolist()
+    for s in range(len(sent_offsets) - 1):
+        lo, hi = sent_offsets[s], sent_offsets[s + 1]
+        tokens = [blob[text_offsets[i]:text_offsets[i + 1]].decode("utf-8") for i in range(lo, hi)]
+        triples = [(tokens[i], tokens[heads[lo + i]], labels[deps[lo + i]]) for i in range(hi - lo)]
+        yield (int(line_numbers[s]), triples) if with_lines else triples
+
+
+def parse_file(input_path, output_dir, model="en_core_web_sm", batch_size=1000, n_process=1,
+               shard_size=100000, compress=False):
+    nlp = ensure_model(model)
+    writer = ShardWriter(output_dir, shard_size, compress)
+    sentences = iter_sentences(input_path)
+    for doc, line_number in nlp.pipe(sentences, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        writer.add(doc, line_number)
+    writer.flush()
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dependency-parse a file of sentences into columnar .npz shards.")
+    parser.add_argument("input", help="text file, one sentence per line")
+    parser.add_argument("output_dir")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--shard-size", type=int, default=100000, help="sentences per shard")
+    parser.add_argument("--compress", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    writer = parse_file(args.input, args.output_dir, args.model, args.batch_size, args.n_process,
+                        args.shard_size, args.compress)
+    elapsed = time.perf_counter() - start
+    print(f"{writer.sentences} sentences, {writer.tokens} tokens, {writer.shards} shards in {elapsed:.1f}s "
+          f"({writer.sentences / elapsed:.0f} sentences/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
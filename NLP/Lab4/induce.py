@@ -0,0 +1,152 @@
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from nltk.grammar import PCFG, Nonterminal, ProbabilisticProduction
+
+# Streaming PCFG induction from bracketed treebanks.
+# Trees are read one at a time and reduced to production counts straight from the bracket
+# tokens, without building Tree objects; only the Counter lives on. Counts from separate
+# shards (files) can be merged, so shards are counted in parallel worker processes.
+# Productions and probabilities match nltk.induce_pcfg over Tree.productions().
+# usage: python induce.py treebank/*.mrg --workers 4 --start S -o grammar.pcfg
+
+PAREN_RE = re.compile(r"[()]")
+TOKEN_RE = re.compile(r"\(\s*([^\s()]*)|\)|[^\s()]+")
+
+
+# Yield each top-level bracketed tree of a text stream, whatever its line layout
+def iter_bracketed(lines):
+    depth = 0
+    parts = []
+    for line in lines:
+        start = 0
+        for m in PAREN_RE.finditer(line):
+            if m.group() == "(":
+                if depth == 0:
+                    start = m.start()
+                depth += 1
+            elif depth > 0:
+                depth -= 1
+                if depth == 0:
+                    parts.append(line[start:m.end()])
+                    yield "".join(parts)
+                    parts = []
+                    start = m.end()
+        if depth > 0:
+            parts.append(line[start:])
+    if depth > 0:
+        raise ValueError("unbalanced brackets at the end of the treebank")
+
+
+# Production counts keyed by (lhs label, rhs); in the rhs a child phrase is its label
+# and a leaf word is a 1-tuple (word,), so the two can never be confused
+class ProductionCounts:
+    def __init__(self):
+        self.counts = Counter()
+        self.trees = 0
+
+    def add_tree(self, s):
+        stack = []
+        for m in TOKEN_RE.finditer(s):
+            token = m.group()
+            if token[0] == "(":
+                stack.append((sys.intern(m.group(1)), []))
+            elif token == ")":
+                label, children = stack.pop()
+                self.counts[label, tuple(children)] += 1
+                if stack:
+                    stack[-1][1].append(label)
+            else:
+                if not stack:
+                    raise ValueError(f"leaf outside of brackets: {token!r}")
+                stack[-1][1].append((sys.intern(token),))
+        if stack:
+            raise ValueError(f"unbalanced tree: {s[:80]!r}")
+        self.trees += 1
+
+    def add_trees(self, lines):
+        for s in iter_bracketed(lines):
+            self.add_tree(s)
+        return self
+
+    def update(self, other):
+        self.counts.update(other.counts)
+        self.trees += other.trees
+        return self
+
+    def __len__(self):
+        return len(self.counts)
+
+    # Relative-frequency PCFG, as nltk.induce_pcfg computes it
+    def to_pcfg(self, start="S"):
+        if not isinstance(start, Nonterminal):
+            start = Nonterminal(start)
+        lhs_totals = Counter()
+        for (lhs, _), count in self.counts.items():
+            lhs_totals[lhs] += count
+
+        symbols = {}
+
+        def symbol(label):
+            if label not in symbols:
+                symbols[label] = Nonterminal(label)
+            return symbols[label]
+
+        prods = []
+        for (lhs, rhs), count in self.counts.items():
+            rhs = [child[0] if isinstance(child, tuple) else symbol(child) for child in rhs]
+            prods.append(ProbabilisticProduction(symbol(lhs), rhs, prob=count / lhs_totals[lhs]))
+        return PCFG(start, prods)
+
+
+# Count one shard; runs in a worker process
+def count_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return ProductionCounts().add_trees(f)
+
+
+# Merge the counts of every shard, with `workers` processes (0 = in-process)
+def count_files(paths, workers=0):
+    total = ProductionCounts()
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for counts in pool.map(count_file, paths):
+                total.update(counts)
+    else:
+        for path in paths:
+            total.update(count_file(path))
+    return total
+
+
+def induce_pcfg_from_files(paths, start="S", workers=0):
+    return count_files(paths, workers).to_pcfg(start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Induce a PCFG from bracketed treebank files.")
+    parser.add_argument("files", nargs="+", help="treebank shards, one or more bracketed trees each")
+    parser.add_argument("--start", default="S")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes, one shard each (0 = in-process)")
+    parser.add_argument("-o", "--output", help="write the grammar here, one production per line")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = count_files(args.files, args.workers)
+    counted = time.perf_counter()
+    pcfg = counts.to_pcfg(args.start)
+    done = time.perf_counter()
+
+    print(f"{counts.trees} trees, {len(counts)} distinct productions, "
+          f"counting {counted - start:.2f}s, PCFG {done - counted:.2f}s", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for prod in pcfg.productions():
+                f.write(f"{prod}\n")
+
+
+if __name__ == "__main__":
+    main()
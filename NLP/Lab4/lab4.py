@@ -1,15 +1,14 @@
 import nltk
-import spacy
-from nltk import CFG
-from math import sqrt
-from spacy import displacy
-from nltk.tree import Tree
-from spacy.cli import download
+from nltk import CFG, Nonterminal
 from nltk.parse import ChartParser
-from nltk.grammar import PCFG, Nonterminal, ProbabilisticProduction
-from nltk import Nonterminal, induce_pcfg, PCFG, ProbabilisticProduction
-download("en_core_web_sm")
-nlp = spacy.load("en_core_web_sm")
+from spacy import displacy
+
+from cky import ViterbiCKYParser
+from cnf import cnf_from_pcfg
+from depparse import ensure_model
+from induce import ProductionCounts
+
+nlp = ensure_model("en_core_web_sm")  # downloads only if the model is missing
 
 '''
 pip install -U pip setuptools wheel
@@ -86,8 +85,8 @@ sentences = [
     "The groom loves dangerous planes more than the bride."
 ]
 
-for s in sentences:
-    doc = nlp(s)  # the full string, not a list of words
+# nlp.pipe batches the sentences; depparse.py does the same for whole corpora
+for s, doc in zip(sentences, nlp.pipe(sentences)):
     print("\nSentence:", s)
     for token in doc:
         print(f"{token.text:10} -> {token.head.text:10} ({token.dep_})")
@@ -108,65 +107,35 @@ tree_strs = [
     "(S (NP (Det the) (N groom)) (VP (V loves) (NP (NP (Adj dangerous) (N planes)) (COMP (Adv more) (PP (Prep than) (NP (Det the) (N bride)))))))"
 ]
 
-trees = [Tree.fromstring(s) for s in tree_strs]
-productions = []
-for t in trees:
-    productions += t.productions()
+# Production counts are taken tree by tree (see induce.py; induce_pcfg_from_files does the same for treebank files)
+counts = ProductionCounts()
+for s in tree_strs:
+    counts.add_tree(s)
 
 S = Nonterminal('S')
-pcfg = induce_pcfg(S, productions)
+pcfg = counts.to_pcfg(S)
 
 print("Original PCFG")
 for p in pcfg.productions():
     print(p)
 print(f"\nTotal rules: {len(pcfg.productions())}\n")
 
-def pcfg_to_cnf(pcfg):
-    cnf_productions = []
-
-    def binarize(prod):
-        lhs, rhs, prob = prod.lhs(), prod.rhs(), prod.prob()
-        if len(rhs) <= 2:
-            return [prod]
-        new_prods = []
-        current_lhs = lhs
-        step_prob = sqrt(prob)  # distribute prob across steps
-
-        for i in range(len(rhs) - 2):
-            new_nt = Nonterminal(f"{lhs}_{i}")
-            new_prods.append(ProbabilisticProduction(current_lhs, [rhs[i], new_nt], prob=step_prob))
-            current_lhs = new_nt
-        new_prods.append(ProbabilisticProduction(current_lhs, list(rhs[-2:]), prob=step_prob))
-        return new_prods
-
-    for prod in pcfg.productions():
-        cnf_productions.extend(binarize(prod))
-
-    # terminal mapping
-    new_prods, terminal_map, next_id = [], {}, 0
-    for prod in cnf_productions:
-        lhs, rhs, prob = prod.lhs(), prod.rhs(), prod.prob()
-        if len(rhs) == 2:
-            new_rhs = []
-            for sym in rhs:
-                if isinstance(sym, str):
-                    if sym not in terminal_map:
-                        terminal_map[sym] = Nonterminal(f"T_{next_id}")
-                        next_id += 1
-                        new_prods.append(ProbabilisticProduction(terminal_map[sym], [sym], prob=1.0))
-                    new_rhs.append(terminal_map[sym])
-                else:
-                    new_rhs.append(sym)
-            new_prods.append(ProbabilisticProduction(lhs, new_rhs, prob=prob))
-        else:
-            new_prods.append(prod)
-
-    return PCFG(pcfg.start(), new_prods)
-
-
-cnf = pcfg_to_cnf(pcfg)
+# Terminal lifting, shared-suffix binarization and unit-chain elimination (see cnf.py);
+# cnf_tables holds the integer-indexed rule tables the CKY parser works on
+cnf_tables = cnf_from_pcfg(pcfg)
+cnf = cnf_tables.to_pcfg()
 
 print("CNF Grammar")
 for p in cnf.productions():
     print(p)
 print(f"\nTotal CNF rules: {len(cnf.productions())}")
+
+
+# 4. Probabilistic CKY parsing with the CNF grammar: best parse and top-k parses
+cky = ViterbiCKYParser(cnf_tables)
+for sent in sentences:
+    tokens = [w.lower() for w in sent.rstrip(".").split()]
+    print("\nSentence:", " ".join(tokens))
+    for tree in cky.parse(tokens, k=2):
+        print(f"log2 p = {tree.logprob():.3f}")
+        tree.pretty_print()
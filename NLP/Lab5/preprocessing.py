@@ -0,0 +1,195 @@
+import os
+import re
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from gensim.corpora import Dictionary, MmCorpus
+
+# Topic-modeling preprocessing for corpora that do not fit the notebook's list comprehensions.
+# Documents are streamed from .xlsx/.csv/.parquet in chunks, chunks are preprocessed in worker
+# processes (lowercase, keep letters, drop stopwords, lemmatize), and the token lists are fed
+# straight into the gensim Dictionary and BoW corpus as they arrive, in document order.
+# Every worker memoizes token -> lemma (None for stopwords), so each distinct token is looked up
+# in WordNet once per worker instead of once per occurrence.
+# The tokens, dictionary and corpus are the same as the notebook's preprocess / Dictionary /
+# filter_extremes / doc2bow steps produce.
+# usage: python preprocessing.py wikiarticles.xlsx --workers 4 -o wiki
+
+NON_ALPHA_RE = re.compile(r"[^a-z\s]")
+EXTRA_STOPWORDS = {'wiki', 'wikipedia', 'edit', 'article', 'page'}
+
+
+def default_stopwords():
+    from nltk.corpus import stopwords
+    return set(stopwords.words('english')) | EXTRA_STOPWORDS
+
+
+def _iter_excel(path, column, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        col = list(next(rows)).index(column)
+        chunk = []
+        for row in rows:
+            chunk.append("" if row[col] is None else str(row[col]))
+            if len(chunk) == chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def _iter_csv(path, column, chunksize):
+    import pandas as pd
+
+    for frame in pd.read_csv(path, usecols=[column], dtype=str, keep_default_na=False, chunksize=chunksize):
+        yield frame[column].tolist()
+
+
+def _iter_parquet(path, column, chunksize):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=[column]):
+        yield ["" if text is None else str(text) for text in batch.column(0).to_pylist()]
+
+
+READERS = {".xlsx": _iter_excel, ".csv": _iter_csv, ".parquet": _iter_parquet}
+
+
+# Lists of at most `chunksize` texts from one column of a spreadsheet, CSV or Parquet file
+def iter_text_chunks(path, column="text", chunksize=1000):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"unsupported file type {ext!r} (expected one of {', '.join(READERS)})")
+    return READERS[ext](path, column, chunksize)
+
+
+# Lists of at most `chunksize` texts from texts already in memory
+def chunked(texts, chunksize=1000):
+    chunk = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Per-process state, set up by _init_worker
+_stopwords = frozenset()
+_lemmatize = None
+_lemmas = {}
+
+
+def _init_worker(stopwords):
+    global _stopwords, _lemmatize
+    from nltk.stem import WordNetLemmatizer
+
+    _stopwords = frozenset(stopwords)
+    _lemmatize = WordNetLemmatizer().lemmatize
+    _lemmas.clear()
+
+
+# Token lists of a chunk of texts; runs in a worker process
+def preprocess_chunk(texts):
+    lemmas = _lemmas
+    docs = []
+    for text in texts:
+        tokens = NON_ALPHA_RE.sub(" ", text.lower()).split()
+        for token in set(tokens).difference(lemmas):
+            lemmas[token] = None if token in _stopwords else _lemmatize(token)
+        docs.append([lemma for lemma in map(lemmas.__getitem__, tokens) if lemma is not None])
+    return docs
+
+
+# Preprocessed chunks in input order, with at most 2 * workers chunks in flight (0 = in-process)
+def _map_chunks(chunks, stopwords, workers):
+    if not workers:
+        _init_worker(stopwords)
+        for chunk in chunks:
+            yield preprocess_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stopwords,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(preprocess_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Dictionary.filter_extremes, with the ids already in `corpus` renumbered to match
+def _filter_extremes(dictionary, corpus, no_below, no_above, keep_n):
+    old_ids = dictionary.token2id.copy()
+    dictionary.filter_extremes(no_below=no_below, no_above=no_above, keep_n=keep_n)
+    new_ids = dictionary.token2id
+    remap = [-1] * len(old_ids)
+    for token, i in old_ids.items():
+        remap[i] = new_ids.get(token, -1)
+    # compactify keeps the relative order of the surviving ids, so each document stays sorted
+    for d, bow in enumerate(corpus):
+        corpus[d] = [(remap[i], count) for i, count in bow if remap[i] >= 0]
+
+
+# (token lists, Dictionary, BoW corpus) of an iterable of text chunks, in a single pass.
+# no_below=None skips filter_extremes; keep_texts=False returns None instead of the token lists.
+def preprocess_chunks(chunks, stopwords=None, workers=0, no_below=2, no_above=0.5, keep_n=100000,
+                      keep_texts=True):
+    if stopwords is None:
+        stopwords = default_stopwords()
+    dictionary = Dictionary()
+    texts = [] if keep_texts else None
+    corpus = []
+    for docs in _map_chunks(chunks, stopwords, workers):
+        for doc in docs:
+            corpus.append(dictionary.doc2bow(doc, allow_update=True))
+        if keep_texts:
+            texts.extend(docs)
+
+    if no_below is not None:
+        _filter_extremes(dictionary, corpus, no_below, no_above, keep_n)
+    return texts, dictionary, corpus
+
+
+def preprocess_texts(texts, chunksize=1000, **kwargs):
+    return preprocess_chunks(chunked(texts, chunksize), **kwargs)
+
+
+def preprocess_file(path, column="text", chunksize=1000, **kwargs):
+    return preprocess_chunks(iter_text_chunks(path, column, chunksize), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocess a text column into a gensim Dictionary and BoW corpus.")
+    parser.add_argument("input", help=".xlsx, .csv or .parquet file")
+    parser.add_argument("--column", default="text")
+    parser.add_argument("--chunksize", type=int, default=1000, help="documents per worker task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (0 = in-process)")
+    parser.add_argument("--no-below", type=int, default=2)
+    parser.add_argument("--no-above", type=float, default=0.5)
+    parser.add_argument("-o", "--output", help="save PREFIX.dict and PREFIX.mm")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    _, dictionary, corpus = preprocess_file(args.input, args.column, args.chunksize, workers=args.workers,
+                                            no_below=args.no_below, no_above=args.no_above, keep_texts=False)
+    elapsed = time.perf_counter() - start
+    print(f"{len(corpus)} documents, {len(dictionary)} terms, {dictionary.num_pos} tokens in {elapsed:.2f}s",
+          file=sys.stderr)
+    if args.output:
+        dictionary.save(f"{args.output}.dict")
+        MmCorpus.serialize(f"{args.output}.mm", corpus, id2word=dictionary)
+
+
+if __name__ == "__main__":
+    main()
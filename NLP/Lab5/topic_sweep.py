@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from gensim.matutils import corpus2csc
+from gensim.models import CoherenceModel, LdaMulticore, TfidfModel
+from sklearn.decomposition import NMF, TruncatedSVD
+
+from preprocessing import preprocess_file
+
+# Topic-count sweep: LDA, SVD and NMF, each on BoW and TF-IDF, for every k of a grid.
+# The Dictionary, BoW and TF-IDF corpora (and their sparse doc x term matrices for sklearn)
+# are built once and shared by every fit, so all models use the same vocabulary.
+# LDA fits run one after another, each parallel inside LdaMulticore; SVD/NMF fits run side by
+# side in a process pool that receives the matrices once per worker.
+# c_v coherence needs sliding-window co-occurrence counts over the texts. These are counted
+# once, for the union of every model's top words, and one CoherenceModel then scores each
+# model by having its topics swapped in (the counts of a word pair do not depend on which
+# other words are tracked, so the scores equal separate CoherenceModel runs).
+# usage: python topic_sweep.py wikiarticles.xlsx --k 2 3 4 5 6 8 10 --workers 4 -o sweep.csv
+
+METHODS = ("lda", "svd", "nmf")
+FEATURES = ("bow", "tfidf")
+
+
+# Corpora shared by every fit
+class SweepCorpus:
+    def __init__(self, texts, dictionary, bow):
+        self.texts = texts
+        self.dictionary = dictionary
+        tfidf = TfidfModel(bow, id2word=dictionary)
+        self.corpora = {"bow": bow, "tfidf": list(tfidf[bow])}
+        self.matrices = {name: corpus2csc(corpus, num_terms=len(dictionary), num_docs=len(corpus)).T.tocsr()
+                         for name, corpus in self.corpora.items()}
+
+
+# Top words of an LdaMulticore fit, with its fit time and perplexity on its own corpus
+def fit_lda(shared, features, k, topn=10, workers=None, **lda_kwargs):
+    corpus = shared.corpora[features]
+    start = time.perf_counter()
+    lda = LdaMulticore(corpus=corpus, id2word=shared.dictionary, num_topics=k, workers=workers, **lda_kwargs)
+    fit_s = time.perf_counter() - start
+    topics = [[word for word, _ in lda.show_topic(t, topn=topn)] for t in range(k)]
+    perplexity = float(np.exp2(-lda.log_perplexity(corpus)))
+    return {"model": "lda", "features": features, "k": k, "perplexity": perplexity, "fit_s": fit_s}, topics
+
+
+# The matrices of the pool workers, set up by _init_worker
+_matrices = None
+_terms = None
+
+
+def _init_worker(matrices, terms):
+    global _matrices, _terms
+    _matrices = matrices
+    _terms = terms
+
+
+# Top words of an SVD or NMF fit and its fit time; runs in a worker process
+def _fit_matrix(method, features, k, topn=10, random_state=42):
+    if method == "svd":
+        model = TruncatedSVD(n_components=k, random_state=random_state)
+    else:
+        model = NMF(n_components=k, init="nndsvd", random_state=random_state)
+    start = time.perf_counter()
+    model.fit(_matrices[features])
+    fit_s = time.perf_counter() - start
+    topics = [[_terms[i] for i in weights.argsort()[::-1][:topn]] for weights in model.components_]
+    return {"model": method, "features": features, "k": k, "perplexity": np.nan, "fit_s": fit_s}, topics
+
+
+# c_v coherence of every model's topics from a single pass of co-occurrence counting
+def score_coherence(shared, all_topics, processes=-1):
+    union = [[word for word in dict.fromkeys(w for topics in all_topics for topic in topics for w in topic)]]
+    cm = CoherenceModel(topics=union, texts=shared.texts, dictionary=shared.dictionary, coherence="c_v",
+                        topn=len(union[0]), processes=processes)
+    cm.estimate_probabilities()
+    scores = []
+    for topics in all_topics:
+        cm.topics = topics
+        scores.append(cm.get_coherence())
+    return scores
+
+
+# Fit every (method, features, k) and return the comparison table, best coherence first.
+# workers: pool size for SVD/NMF and LdaMulticore workers (None = all cores but one)
+def sweep(texts, dictionary, bow, ks, methods=METHODS, features=FEATURES, workers=None, topn=10,
+          random_state=42, lda_kwargs=None):
+    shared = SweepCorpus(texts, dictionary, bow)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    lda_kwargs = {"random_state": random_state, **(lda_kwargs or {})}
+    fits = []
+
+    if "lda" in methods:
+        for f in features:
+            for k in ks:
+                fits.append(fit_lda(shared, f, k, topn, workers, **lda_kwargs))
+
+    jobs = [(m, f, k) for m in methods if m != "lda" for f in features for k in ks]
+    if jobs:
+        terms = [dictionary[i] for i in range(len(dictionary))]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.matrices, terms)) as pool:
+            futures = [pool.submit(_fit_matrix, m, f, k, topn, random_state) for m, f, k in jobs]
+            fits.extend(future.result() for future in futures)
+
+    rows = [row for row, _ in fits]
+    for row, coherence in zip(rows, score_coherence(shared, [topics for _, topics in fits], workers)):
+        row["coherence"] = coherence
+    table = pd.DataFrame(rows, columns=["model", "features", "k", "coherence", "perplexity", "fit_s"])
+    return table.sort_values("coherence", ascending=False, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LDA, SVD and NMF over a grid of topic counts.")
+    parser.add_argument("input", help=".xlsx, .csv or .parquet file")
+    parser.add_argument("--column", default="text")
+    parser.add_argument("--k", type=int, nargs="+", default=[2, 3, 4, 5, 6, 8, 10])
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--features", nargs="+", choices=FEATURES, default=list(FEATURES))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--topn", type=int, default=10, help="top words per topic for coherence")
+    parser.add_argument("-o", "--output", help="write the table as CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    texts, dictionary, bow = preprocess_file(args.input, args.column, workers=args.workers or 0)
+    prepared = time.perf_counter()
+    table = sweep(texts, dictionary, bow, args.k, args.methods, args.features, args.workers, args.topn)
+    done = time.perf_counter()
+
+    print(table.to_string(index=False))
+    print(f"preprocessing {prepared - start:.1f}s, sweep {done - prepared:.1f}s", file=sys.stderr)
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
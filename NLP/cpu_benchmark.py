@@ -0,0 +1,204 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import importlib.util
+
+import torch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROMPTS = [
+    "The weather today is",
+    "I would like to",
+    "The best way to learn a language",
+    "She opened the door and",
+    "In the middle of the night",
+    "The results of the experiment were",
+    "My favourite food is",
+    "He looked at the sky and",
+]
+
+QA_CONTEXT = ("In computer science, the Cocke-Younger-Kasami algorithm (alternatively called CYK, or CKY) "
+              "is a parsing algorithm for context-free grammars published by Itiroo Sakai in 1961. "
+              "The algorithm is named after some of its rediscoverers: John Cocke, Daniel Younger, "
+              "Tadao Kasami, and Jacob T. Schwartz. It employs bottom-up parsing and dynamic programming.")
+QA_QUESTIONS = [
+    "When was the algorithm published?",
+    "Who published the algorithm?",
+    "What kind of parsing does the algorithm employ?",
+    "What is the algorithm also called?",
+    "What grammars does the algorithm parse?",
+    "Who are the rediscoverers of the algorithm?",
+]
+
+
+# Load a lab script by path ("Lab 2.py" is not importable by name)
+def load_module(name, relpath):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, relpath))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Size of the serialized weights, which is what quantization shrinks
+def model_size_mb(model):
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 2**20
+
+
+# Current resident memory (Linux); falls back to the peak where /proc is missing
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+# Peak resident memory of this process; each configuration runs in its own process (run_isolated)
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def timed(fn, repeats):
+    latencies = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, latencies
+
+
+def summarize(latencies, items_per_call):
+    total_s = sum(latencies) / 1000
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "throughput_per_s": items_per_call * len(latencies) / total_s if total_s else None,
+    }
+
+
+# Greedy next token per prompt (deterministic, so fp32 and int8 can be compared) and batch latency
+def bench_gpt2(lab2, optimized, repeats, threads):
+    tokenizer, model = lab2.load_gpt2(optimized=optimized, num_threads=threads)
+    enc = tokenizer(PROMPTS, return_tensors="pt", padding=True).to(model.device)
+    # Left padding: position ids must skip the pads
+    position_ids = (enc["attention_mask"].cumsum(-1) - 1).clamp(min=0)
+
+    def forward():
+        with torch.inference_mode():
+            logits = model(**enc, position_ids=position_ids).logits[:, -1, :]
+        return logits.argmax(-1).tolist()
+
+    forward()  # warm-up
+    next_tokens, batch_latencies = timed(forward, repeats)
+
+    def single():
+        return lab2.generate_next_words(model, tokenizer, PROMPTS[0], num_words=2)
+
+    _, single_latencies = timed(single, repeats)
+
+    return {
+        "model_size_mb": model_size_mb(model),
+        "rss_mb": rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+        "batch_forward": summarize(batch_latencies, len(PROMPTS)),
+        "generate_next_words": summarize(single_latencies, 1),
+    }, next_tokens
+
+
+def bench_bert(lab3, optimized, repeats, threads):
+    model, tokenizer = lab3.load_bert_qa(optimized=optimized, num_threads=threads)
+
+    def answer_all():
+        return [lab3.question_answer(q, QA_CONTEXT, model=model, tokenizer=tokenizer) for q in QA_QUESTIONS]
+
+    answer_all()  # warm-up
+    answers, latencies = timed(answer_all, repeats)
+
+    return {
+        "model_size_mb": model_size_mb(model),
+        "rss_mb": rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+        "questions": summarize(latencies, len(QA_QUESTIONS)),
+    }, answers
+
+
+BENCHES = {
+    "gpt2": (bench_gpt2, "lab2", os.path.join("Lab2", "Lab 2.py")),
+    "bert": (bench_bert, "lab3", os.path.join("Lab3", "Lab3.py")),
+}
+
+
+# Benchmark one model in one configuration in a fresh interpreter, so that its memory figures
+# do not include the models loaded by earlier configurations
+def run_isolated(model, optimized, repeats, threads):
+    cmd = [sys.executable, os.path.abspath(__file__), "--single", model, "--repeats", str(repeats)]
+    if optimized:
+        cmd.append("--optimized")
+    if threads:
+        cmd += ["--threads", str(threads)]
+    stdout = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    result = json.loads(stdout.strip().splitlines()[-1])
+    return result["stats"], result["outputs"]
+
+
+def agreement(a, b):
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs optimized (int8 dynamic quantization) CPU inference.")
+    parser.add_argument("--models", nargs="+", choices=["gpt2", "bert"], default=["gpt2", "bert"])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads for the optimized runs")
+    parser.add_argument("-o", "--output", default="cpu_benchmark.json")
+    parser.add_argument("--single", choices=list(BENCHES), help=argparse.SUPPRESS)
+    parser.add_argument("--optimized", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process of run_isolated: one configuration, result as the last line of stdout
+    if args.single:
+        bench, name, relpath = BENCHES[args.single]
+        stats, outputs = bench(load_module(name, relpath), args.optimized, args.repeats, args.threads)
+        print(json.dumps({"stats": stats, "outputs": outputs}))
+        return
+
+    report = {"torch": torch.__version__, "threads": torch.get_num_threads()}
+
+    if "gpt2" in args.models:
+        base, base_tokens = run_isolated("gpt2", False, args.repeats, None)
+        opt, opt_tokens = run_isolated("gpt2", True, args.repeats, args.threads)
+        report["gpt2"] = {"fp32": base, "optimized": opt,
+                          "next_token_agreement": agreement(base_tokens, opt_tokens)}
+
+    if "bert" in args.models:
+        base, base_answers = run_isolated("bert", False, args.repeats, None)
+        opt, opt_answers = run_isolated("bert", True, args.repeats, args.threads)
+        report["bert_qa"] = {"fp32": base, "optimized": opt,
+                             "answer_agreement": agreement(base_answers, opt_answers),
+                             "answers": list(zip(QA_QUESTIONS, base_answers, opt_answers))}
+
+    print(json.dumps(report, indent=2))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()